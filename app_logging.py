@@ -0,0 +1,107 @@
+"""
+Logging de la API: nivel y formato por variables de entorno, una línea de
+resumen por request y detalle por fila solo en una muestra de requests.
+
+- LOG_LEVEL (INFO por omisión): nivel del logger raíz.
+- LOG_FORMAT: "text" ([NIVEL] mensaje campo=valor ...) o "json" (un objeto por línea).
+- LOG_ROW_SAMPLE_RATE (0 por omisión): fracción de requests en la que
+  log_rows() escribe el detalle de cada fila (requiere LOG_LEVEL=DEBUG).
+- LOG_REQUESTS=0 desactiva la línea de resumen por request.
+
+Los mensajes usan formato diferido (logger.debug("x=%s", x)): si el nivel no
+está activo no se arma ningún string. Los campos estructurados se pasan con
+annotate() durante el request y salen en su línea de resumen.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_ROW_SAMPLE_RATE = float(os.getenv("LOG_ROW_SAMPLE_RATE", 0))
+LOG_REQUESTS = os.getenv("LOG_REQUESTS", "1") != "0"
+
+logger = logging.getLogger("api")
+
+# Campos del request en curso y si entra en la muestra de detalle por fila
+_fields = contextvars.ContextVar("log_fields", default=None)
+_sampled = contextvars.ContextVar("log_sampled", default=False)
+
+# Atributos estándar de LogRecord; el resto son campos estructurados (extra=)
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+def _extra_fields(record):
+    return {k: v for k, v in vars(record).items() if k not in _RESERVED}
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = f"[{record.levelname}] {record.getMessage()}"
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data.update(_extra_fields(record))
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+def configure(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """Configura el logger raíz (una sola vez; reemplaza los handlers existentes)"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONFormatter() if fmt == "json" else TextFormatter())
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+def annotate(**fields):
+    """Agrega campos a la línea de resumen del request en curso"""
+    current = _fields.get()
+    if current is not None:
+        current.update(fields)
+
+def log_rows(log, label, rows, fields):
+    """
+    Detalle (solo `fields`) de cada fila, a nivel DEBUG, únicamente si el request
+    entró en la muestra de LOG_ROW_SAMPLE_RATE. Sin muestra no recorre las filas.
+    """
+    if not _sampled.get() or not log.isEnabledFor(logging.DEBUG):
+        return
+    for row in rows:
+        log.debug("%s %s", label, " ".join(f"{f}={row[f]}" for f in fields))
+
+async def request_log_middleware(request, call_next):
+    """Una línea INFO por request: método, ruta, status, duración y los campos de annotate()"""
+    if not LOG_REQUESTS:
+        return await call_next(request)
+
+    fields_token = _fields.set({})
+    sampled_token = _sampled.set(LOG_ROW_SAMPLE_RATE > 0 and random.random() < LOG_ROW_SAMPLE_RATE)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "%s %s %s", request.method, request.url.path, status,
+                extra={"duration_ms": round((time.perf_counter() - start) * 1000, 1), **_fields.get()},
+            )
+        _fields.reset(fields_token)
+        _sampled.reset(sampled_token)
@@ -0,0 +1,384 @@
+"""
+Load-test and benchmark suite for the API.
+
+1. seed: fill a database with a synthetic, deterministic catalog
+       python bench_api.py seed --productos 10000 --precios 1000000 --reset --migrate
+
+   It uses the connection settings from .env. Point DB_NAME at a dedicated
+   database, e.g. a local MariaDB container:
+       docker run -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=bench -e MARIADB_DATABASE=splashmix_bench mariadb:11
+   --migrate applies migrations/ first. --reset empties every table first and
+   only runs when DB_NAME ends in "_bench" (or with --force). The same sizes
+   and --seed-value always produce the same rows.
+
+2. run: drive every GET route of main.py against a running API
+       uvicorn main:app --port 8000
+       python bench_api.py run --url http://localhost:8000 --concurrency 16 --duration 20 --output bench.json
+
+   The route list is read from main.app, so new GET endpoints are benchmarked
+   automatically (an unknown path parameter is an error). Ids, countries and
+   offsets are drawn from the seeded data. In --mode each (default) every
+   scenario runs alone for --duration seconds at --concurrency. In --mode mixed
+   all scenarios share the workers for --duration seconds. Requests during the
+   --warmup seconds are not counted.
+
+   The JSON report has, per scenario and overall: requests, errors, status
+   codes, throughput (req/s) and latency p50/p95/p99/mean/max in ms, plus the
+   configuration, dataset sizes and git commit.
+
+Restart the API (or POST /cache/invalidar) after seeding so the caches pick up the new data.
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import math
+import os
+import random
+import string
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from bulk_loader import BulkLoader, now
+from connection import get_connection, DB_CONFIG
+
+TABLES = ("conjunto", "tipo_producto", "pais", "producto", "pertenencia", "textos", "precio")
+PRECIO_CHUNK = 100_000
+AMBIENTES = ("sandbox", "production")
+
+# ============ SEED ============
+
+def _pais_codes(n):
+    """(id, iso_alpha2) synthetic and unique: P000/AA, P001/AB, ..."""
+    letters = string.ascii_uppercase
+    return [(f"P{i:03d}", letters[i // 26 % 26] + letters[i % 26]) for i in range(n)]
+
+def synthetic_tables(sizes, seed):
+    """{table: (columns, rows)} in foreign-key order; rows are generators"""
+    rng = random.Random(seed)
+    created = now()
+    paises = _pais_codes(sizes["paises"])
+    productos, conjuntos, tipos = sizes["productos"], sizes["conjuntos"], sizes["tipos"]
+    # Each pertenencia is a distinct (conjunto, producto) pair (unique key of migration 011)
+    pertenencias = min(sizes["pertenencias"], productos * conjuntos)
+
+    return {
+        "conjunto": (
+            ("id", "sitio", "nombre", "created_at"),
+            ((i, "bench", f"conjunto {i}", created) for i in range(1, conjuntos + 1)),
+        ),
+        "tipo_producto": (
+            ("id", "nombre", "unidad_base"),
+            ((i, f"tipo {i}", f"unidad {i}") for i in range(1, tipos + 1)),
+        ),
+        "pais": (
+            ("id", "iso_alpha2", "nombre", "moneda", "moneda_tic", "simbolo", "side", "decs"),
+            ((pid, iso, f"Pais {iso}", pid, pid.lower(), "$", i % 2, 2) for i, (pid, iso) in enumerate(paises)),
+        ),
+        "producto": (
+            ("id", "nombre", "cantidad", "id_tipo_producto", "id_conjunto", "precio_base", "created_at"),
+            ((i, f"producto {i}", rng.randint(1, 500), rng.randint(1, tipos), rng.randint(1, conjuntos),
+              rng.randint(10, 5000), created) for i in range(1, productos + 1)),
+        ),
+        "pertenencia": (
+            ("id", "id_conjunto", "id_producto", "created_at"),
+            ((i, (i - 1) // productos % conjuntos + 1, (i - 1) % productos + 1, created) for i in range(1, pertenencias + 1)),
+        ),
+        "textos": (
+            ("id", "id_tipo_producto", "id_pais", "unidad", "unidades"),
+            ((i, tipo, pid, f"unidad {tipo}", f"unidades {tipo}")
+             for i, (tipo, (pid, _)) in enumerate(itertools.product(range(1, tipos + 1), paises), start=1)),
+        ),
+        "precio": (
+            ("id", "nombre", "id_pertenencia", "id_pais", "price_id", "cantidad_precio", "ratio_imagen", "status", "ambiente", "created_at"),
+            ((i, f"precio {i}", rng.randint(1, pertenencias), rng.choice(paises)[0], f"price_bench_{i:09d}",
+              rng.randint(100, 100000), rng.choice((1, 2, 4)), "active", rng.choice(AMBIENTES), created)
+             for i in range(1, sizes["precios"] + 1)),
+        ),
+    }
+
+def reset_tables():
+    conn = get_connection()
+    if not conn:
+        raise SystemExit("Could not connect to database")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in TABLES:
+            cursor.execute(f"TRUNCATE TABLE {table}")
+            print(f"Emptied {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    finally:
+        cursor.close()
+        conn.close()
+
+def seed(sizes, seed_value=42, reset=False, migrate_first=False, force=False):
+    database = DB_CONFIG["database"] or ""
+    print(f"Seeding {database} on {DB_CONFIG['host']}:{DB_CONFIG['port']}: {sizes}")
+    if migrate_first:
+        import migrate
+        if migrate.main(["migrate"]) != 0:
+            raise SystemExit("Migrations failed")
+    if reset:
+        if not database.endswith("_bench") and not force:
+            raise SystemExit(f"Refusing to empty {database!r}: DB_NAME must end in '_bench' (or pass --force)")
+        reset_tables()
+
+    start = time.perf_counter()
+    for table, (columns, rows) in synthetic_tables(sizes, seed_value).items():
+        loader = BulkLoader(table, columns)
+        if table == "precio":
+            # One transaction per chunk instead of one for a million rows
+            rows = iter(rows)
+            while True:
+                chunk = list(itertools.islice(rows, PRECIO_CHUNK))
+                if not chunk:
+                    break
+                loader.load(chunk)
+        else:
+            loader.load(rows)
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+# ============ RUN ============
+
+# Routes whose {pais_id} is an ISO alpha-2 code instead of the pais id
+ISO_ROUTES = {"/precios/pais/{pais_id}"}
+
+# Extra variants of list routes: filters, keyset pagination and deep offsets
+EXTRA_SCENARIOS = (
+    ("/precios?pais&ambiente", "/precios?limit=100&pais={iso}&ambiente={ambiente}"),
+    ("/precios?cursor", "/precios?limit=100&cursor="),
+    ("/precios?skip=deep", "/precios?limit=100&skip={deep_precio}"),
+    ("/productos?skip=deep", "/productos?limit=100&skip={deep_producto}"),
+    ("/productos?total=estimado", "/productos?limit=100&total=estimado"),
+)
+
+class Dataset:
+    """Values to build requests with, read from the seeded database"""
+
+    def __init__(self):
+        conn = get_connection()
+        if not conn:
+            raise SystemExit("Could not connect to database")
+        cursor = conn.cursor()
+        try:
+            self.counts = {}
+            self.max_id = {}
+            for table in TABLES:
+                if table == "pais":
+                    continue
+                cursor.execute(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {table}")
+                self.counts[table], self.max_id[table] = cursor.fetchone()
+            cursor.execute("SELECT id, iso_alpha2 FROM pais WHERE iso_alpha2 IS NOT NULL")
+            self.paises = cursor.fetchall()
+            self.counts["pais"] = len(self.paises)
+        finally:
+            cursor.close()
+            conn.close()
+        if not self.paises or not self.max_id.get("precio"):
+            raise SystemExit("The database has no data; run `python bench_api.py seed` first")
+
+    def values(self, rng):
+        pais_id, iso = rng.choice(self.paises)
+        return {
+            "conjunto_id": rng.randint(1, self.max_id["conjunto"]),
+            "tipo_id": rng.randint(1, self.max_id["tipo_producto"]),
+            "producto_id": rng.randint(1, self.max_id["producto"]),
+            "pertenencia_id": rng.randint(1, self.max_id["pertenencia"]),
+            "texto_id": rng.randint(1, self.max_id["textos"]),
+            "precio_id": rng.randint(1, self.max_id["precio"]),
+            "pais_id": pais_id,
+            "iso": iso,
+            "ambiente": rng.choice(AMBIENTES),
+            "deep_precio": max(0, self.counts["precio"] - 200),
+            "deep_producto": max(0, self.counts["producto"] - 200),
+        }
+
+def get_routes():
+    """(path template, is_list) of every GET route of main.app that is in the OpenAPI schema"""
+    from fastapi.routing import APIRoute
+    from main import app
+    from models import ListResponse
+
+    return [
+        (route.path, route.response_model is ListResponse)
+        for route in app.routes
+        if isinstance(route, APIRoute) and "GET" in route.methods and route.include_in_schema
+    ]
+
+def scenarios(routes, dataset):
+    """[(name, url template)] for every GET route plus EXTRA_SCENARIOS"""
+    known = set(dataset.values(random.Random(0)))
+    result = []
+    for path, is_list in routes:
+        template = path
+        if path in ISO_ROUTES:
+            template = template.replace("{pais_id}", "{iso}")
+        for field in string.Formatter().parse(template):
+            if field[1] and field[1] not in known:
+                raise SystemExit(f"No sample value for path parameter {{{field[1]}}} of {path}; add it to Dataset.values")
+        result.append((path, template + ("?limit=100" if is_list else "")))
+    return result + list(EXTRA_SCENARIOS)
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of an ascending list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+def summarize(samples, seconds):
+    """Stats of a list of (status, latency_s)"""
+    latencies = sorted(latency * 1000 for _, latency in samples)
+    status = {}
+    for code, _ in samples:
+        status[str(code)] = status.get(str(code), 0) + 1
+    errors = sum(count for code, count in status.items() if code == "error" or int(code) >= 500)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "status": status,
+        "throughput_rps": round(len(samples) / seconds, 2) if seconds > 0 else None,
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 0.50)),
+            "p95": _round(percentile(latencies, 0.95)),
+            "p99": _round(percentile(latencies, 0.99)),
+            "mean": _round(sum(latencies) / len(latencies)) if latencies else None,
+            "max": _round(latencies[-1]) if latencies else None,
+        },
+    }
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+def _worker(base, scenario_list, dataset, seed, warmup_until, deadline, results):
+    """Sends requests over one keep-alive connection until `deadline`; appends (name, status, latency)"""
+    rng = random.Random(seed)
+    conn = None
+    samples = []
+    for i in itertools.count(seed):
+        now_ = time.perf_counter()
+        if now_ >= deadline:
+            break
+        name, template = scenario_list[i % len(scenario_list)]
+        path = base.path.rstrip("/") + template.format(**dataset.values(rng))
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection(base.hostname, base.port or 80, timeout=30)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = "error"
+            if conn is not None:
+                conn.close()
+            conn = None
+        end = time.perf_counter()
+        if start >= warmup_until:
+            samples.append((name, status, end - start))
+    if conn is not None:
+        conn.close()
+    results.extend(samples)
+
+def drive(base, scenario_list, dataset, concurrency, duration, warmup, seed):
+    """Runs `concurrency` workers over the scenarios; returns (samples, measured seconds)"""
+    results = []
+    start = time.perf_counter()
+    warmup_until = start + warmup
+    deadline = warmup_until + duration
+    threads = [
+        threading.Thread(target=_worker, args=(base, scenario_list, dataset, seed + n * 7919, warmup_until, deadline, results))
+        for n in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, duration
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run(url, concurrency=16, duration=20.0, warmup=2.0, mode="each", seed=42, only=None):
+    base = urlsplit(url)
+    dataset = Dataset()
+    scenario_list = scenarios(get_routes(), dataset)
+    if only:
+        scenario_list = [s for s in scenario_list if any(pattern in s[0] for pattern in only)]
+
+    report = {
+        "config": {
+            "url": url, "concurrency": concurrency, "duration_s": duration, "warmup_s": warmup,
+            "mode": mode, "seed": seed, "git_commit": _git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "dataset": dataset.counts,
+        "endpoints": {},
+    }
+    all_samples = []
+    total_seconds = 0.0
+    if mode == "mixed":
+        print(f"Mixed run: {len(scenario_list)} scenarios, {concurrency} workers, {duration}s", file=sys.stderr)
+        samples, total_seconds = drive(base, scenario_list, dataset, concurrency, duration, warmup, seed)
+        all_samples = samples
+        for name, _ in scenario_list:
+            report["endpoints"][name] = summarize([(s, l) for n, s, l in samples if n == name], duration)
+    else:
+        for name, template in scenario_list:
+            print(f"{name}: {concurrency} workers, {duration}s", file=sys.stderr)
+            samples, seconds = drive(base, [(name, template)], dataset, concurrency, duration, warmup, seed)
+            report["endpoints"][name] = summarize([(s, l) for _, s, l in samples], seconds)
+            all_samples.extend(samples)
+            total_seconds += seconds
+    report["total"] = summarize([(s, l) for _, s, l in all_samples], total_seconds)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a synthetic catalog and benchmark the API's GET endpoints")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="fill the database from .env with synthetic data")
+    seed_parser.add_argument("--conjuntos", type=int, default=3)
+    seed_parser.add_argument("--tipos", type=int, default=3)
+    seed_parser.add_argument("--paises", type=int, default=20)
+    seed_parser.add_argument("--productos", type=int, default=10_000)
+    seed_parser.add_argument("--pertenencias", type=int, default=10_000)
+    seed_parser.add_argument("--precios", type=int, default=1_000_000)
+    seed_parser.add_argument("--seed-value", type=int, default=42, help="random seed (same seed, same data)")
+    seed_parser.add_argument("--reset", action="store_true", help="empty every table first (DB_NAME must end in _bench)")
+    seed_parser.add_argument("--force", action="store_true", help="allow --reset on any database")
+    seed_parser.add_argument("--migrate", action="store_true", help="apply migrations/ first")
+
+    run_parser = commands.add_parser("run", help="benchmark a running API")
+    run_parser.add_argument("--url", default="http://localhost:8000")
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--duration", type=float, default=20.0, help="seconds per scenario (each) or in total (mixed)")
+    run_parser.add_argument("--warmup", type=float, default=2.0, help="seconds not counted at the start of each run")
+    run_parser.add_argument("--mode", choices=["each", "mixed"], default="each")
+    run_parser.add_argument("--seed-value", type=int, default=42)
+    run_parser.add_argument("--only", action="append", help="only scenarios containing this text (repeatable)")
+    run_parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.command == "seed":
+        sizes = {name: getattr(args, name) for name in ("conjuntos", "tipos", "paises", "productos", "pertenencias", "precios")}
+        seed(sizes, args.seed_value, args.reset, args.migrate, args.force)
+    else:
+        report = run(args.url, args.concurrency, args.duration, args.warmup, args.mode, args.seed_value, args.only)
+        text = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+            print(f"Report written to {args.output}", file=sys.stderr)
+        else:
+            print(text)
@@ -0,0 +1,90 @@
+"""
+Serialization benchmark for a 100-row /precios page.
+
+Compares, for the same page of PrecioDetallado rows:
+- before: ListResponse(...) -> FastAPI response_model validation and
+  serialization -> JSONResponse (json.dumps), the path the endpoints used,
+- after (dicts): fast_json.list_response() serializing the page with orjson,
+- after (snapshot): fast_json.list_response() with the page as Records, what
+  /precios serializes when the price catalog is enabled.
+
+Rows are synthetic, so no database is needed. Both paths must produce the
+same JSON document; the script checks it before timing.
+
+Usage:
+    python bench_serialization.py                  # 100 rows, 2000 iterations
+    python bench_serialization.py --rows 50 --iterations 5000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from fast_json import list_response
+from models import ListResponse
+from queries import PRECIO
+
+def sample_precios(n):
+    """`n` rows shaped like queries.PRECIO.map_row()"""
+    return [
+        {
+            "id": i, "nombre": f"Splashmix {i % 7} creditos - Mexico", "id_pertenencia": i % 40 + 1, "id_pais": "MXN",
+            "price_id": f"price_1Pq{i:020d}", "cantidad_precio": 100 + i, "ratio_imagen": 4, "status": "active",
+            "ambiente": "production" if i % 2 else "sandbox",
+            "pertenencia_id": i % 40 + 1, "producto_nombre": f"Paquete {i % 12}", "producto_cantidad": 10 * (i % 5 + 1),
+            "tipo_producto_nombre": "creditos", "conjunto_nombre": "splashmix",
+            "pais_nombre": "México", "pais_moneda": "MXN", "pais_simbolo": "$", "pais_side": True, "pais_decs": 2,
+        }
+        for i in range(1, n + 1)
+    ]
+
+def before(field, precios):
+    content = ListResponse(success=True, message=f"Se obtuvieron {len(precios)} precios", data=precios, total=len(precios), next_cursor=None)
+    value = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(value).body
+
+def after(precios):
+    return list_response(f"Se obtuvieron {len(precios)} precios", precios, len(precios), "exacto", None).body
+
+def timed(fn, iterations):
+    """Microseconds per call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+def run(rows, iterations):
+    field = create_response_field(name="Response_bench", type_=ListResponse)
+    precios = sample_precios(rows)
+    records = [PRECIO.record(*precio.values()) for precio in precios]
+
+    expected = json.loads(before(field, precios))
+    for body in (after(precios), after(records)):
+        if json.loads(body) != expected:
+            raise SystemExit("Fast path output differs from the validated response")
+
+    # serialize_response is a coroutine; its asyncio.run overhead is timed separately and subtracted
+    loop_overhead = timed(lambda: asyncio.run(asyncio.sleep(0)), iterations)
+    results = [
+        ("before: ListResponse + response_model + json.dumps", timed(lambda: before(field, precios), iterations) - loop_overhead),
+        ("after: orjson, one call per page", timed(lambda: after(precios), iterations)),
+        ("after: orjson, snapshot Records", timed(lambda: after(records), iterations)),
+    ]
+
+    baseline = results[0][1]
+    print(f"{rows} rows per page, {iterations} iterations, {len(after(precios))} bytes per page")
+    for name, us in results:
+        print(f"{name:<52} {us:>9.1f} us/page  {baseline / us:>5.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serialization cost of a /precios page, before and after the orjson fast path")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.rows, args.iterations)
@@ -0,0 +1,188 @@
+"""
+Shared bulk loader for the populate_* scripts.
+
+Rows are written with multi-row INSERT statements (BULK_BATCH_SIZE rows per
+statement, optionally ON DUPLICATE KEY UPDATE / IGNORE) inside a single
+transaction, instead of one INSERT and one round trip per row.
+
+Input can be a pandas DataFrame or any iterable of tuples/dicts. For
+DataFrames, map_columns() builds the target columns column-wise (vectorized)
+instead of walking the frame with iterrows().
+
+For large files, read_chunks() streams an .xlsx (openpyxl read-only mode) or
+.csv in DataFrames of STREAM_CHUNK_SIZE rows and stream_rows() maps each
+chunk and feeds it to the loader, so only one chunk is in memory at a time.
+"""
+
+import os
+import time
+from datetime import datetime
+
+from connection import get_connection
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", 1000))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 10000))
+
+def now():
+    """Timestamp in the format the scripts store in created_at"""
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def map_columns(df, mapping):
+    """
+    New DataFrame with the target columns from `mapping`.
+
+    Each value is a source column name or a callable taking the whole frame
+    and returning a Series (or a scalar, broadcast to every row).
+    """
+    import pandas as pd
+
+    columns = {}
+    for target, source in mapping.items():
+        columns[target] = source(df) if callable(source) else df[source]
+    return pd.DataFrame(columns, index=df.index)
+
+def _frame_rows(df):
+    # object dtype turns numpy scalars into Python values the driver understands
+    df = df.astype(object).where(df.notna(), None)
+    return df.itertuples(index=False, name=None)
+
+def read_frame(path, header=0):
+    """Whole .xlsx or .csv file as a DataFrame"""
+    import pandas as pd
+
+    if path.endswith(".csv"):
+        return pd.read_csv(path, header=header)
+    return pd.read_excel(path, header=header)
+
+def read_chunks(path, header=0, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    DataFrames of up to `chunk_size` rows from an .xlsx or .csv file, read
+    without loading the whole file. `header` is the 0-based row with the column names.
+    """
+    import pandas as pd
+
+    if path.endswith(".csv"):
+        yield from pd.read_csv(path, header=header, chunksize=chunk_size)
+        return
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        for _ in range(header):
+            next(rows, None)
+        names = next(rows, None)
+        if names is None:
+            return
+        # Same names pandas gives to columns without header
+        columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(names)]
+        width = len(columns)
+
+        chunk = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            chunk.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+def stream_rows(chunks, mapping):
+    """Rows (tuples in `mapping` order) of every chunk after map_columns, one chunk at a time"""
+    for chunk in chunks:
+        yield from _frame_rows(map_columns(chunk, mapping))
+
+class LoadStats:
+    """Outcome of a load"""
+    __slots__ = ("table", "rows", "batches", "seconds")
+
+    def __init__(self, table, rows=0, batches=0, seconds=0.0):
+        self.table = table
+        self.rows = rows
+        self.batches = batches
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+    def __str__(self):
+        return (f"{self.table}: {self.rows} rows in {self.batches} batches, "
+                f"{self.seconds:.3f}s ({self.rows_per_second:,.0f} rows/s)")
+
+class BulkLoader:
+    """
+    Batched multi-row INSERT into `table`.
+
+    - update_columns: columns refreshed ON DUPLICATE KEY UPDATE (upsert).
+    - ignore: INSERT IGNORE, existing keys are skipped.
+    - conn: connection to use; if omitted the loader opens and closes its own.
+    """
+
+    def __init__(self, table, columns, update_columns=None, ignore=False,
+                 batch_size=BULK_BATCH_SIZE, conn=None):
+        self.table = table
+        self.columns = list(columns)
+        self.update_columns = list(update_columns or [])
+        self.ignore = ignore
+        self.batch_size = max(1, batch_size)
+        self.conn = conn
+        self._statements = {}
+
+    def _statement(self, n):
+        """INSERT for `n` rows (cached: only the full batch size and the last partial batch are built)"""
+        sql = self._statements.get(n)
+        if sql is None:
+            row = "(" + ", ".join(["%s"] * len(self.columns)) + ")"
+            sql = (f"INSERT {'IGNORE ' if self.ignore else ''}INTO {self.table} "
+                   f"({', '.join(self.columns)}) VALUES " + ", ".join([row] * n))
+            if self.update_columns:
+                sql += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{c} = VALUES({c})" for c in self.update_columns)
+            self._statements[n] = sql
+        return sql
+
+    def _rows(self, rows):
+        if hasattr(rows, "itertuples"):
+            return _frame_rows(rows[self.columns])
+        return (tuple(row[c] for c in self.columns) if isinstance(row, dict) else tuple(row) for row in rows)
+
+    def _flush(self, cursor, batch, stats):
+        cursor.execute(self._statement(len(batch)), [value for row in batch for value in row])
+        stats.rows += len(batch)
+        stats.batches += 1
+
+    def load(self, rows):
+        """Write every row in one transaction and return its LoadStats. On error everything is rolled back"""
+        conn = self.conn or get_connection()
+        if not conn:
+            raise ConnectionError("Could not connect to database")
+
+        stats = LoadStats(self.table)
+        start = time.perf_counter()
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            batch = []
+            for row in self._rows(rows):
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self._flush(cursor, batch, stats)
+                    batch = []
+            if batch:
+                self._flush(cursor, batch, stats)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            if self.conn is None:
+                conn.close()
+        stats.seconds = time.perf_counter() - start
+        print(f"Loaded {stats}")
+        return stats
@@ -0,0 +1,112 @@
+"""
+Caché en memoria de las tablas de referencia: conjunto, tipo_producto y pais.
+
+Son tablas pequeñas que casi nunca cambian, así que se leen completas una vez
+y se sirven desde memoria. Cada tabla se recarga al vencer su TTL
+(CATALOG_CACHE_TTL, en segundos) o cuando se invalida explícitamente con
+invalidate(). Cada carga calcula una versión (huella del contenido): si la
+recarga trae los mismos datos la versión no cambia.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+
+import db
+
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", 300))
+
+# Consulta y columnas públicas de cada tabla. Las columnas extra al final de la
+# consulta solo se usan para índices (iso_alpha2 de pais).
+REFERENCE_TABLES = {
+    "conjunto": (
+        "SELECT id, sitio, nombre FROM conjunto ORDER BY id",
+        ("id", "sitio", "nombre"),
+    ),
+    "tipo_producto": (
+        "SELECT id, nombre, unidad_base FROM tipo_producto ORDER BY id",
+        ("id", "nombre", "unidad_base"),
+    ),
+    "pais": (
+        "SELECT id, nombre, moneda, moneda_tic, simbolo, side, decs, iso_alpha2 FROM pais ORDER BY id",
+        ("id", "nombre", "moneda", "moneda_tic", "simbolo", "side", "decs"),
+    ),
+}
+
+def ci_key(value):
+    """Llave de búsqueda sin distinguir mayúsculas, como compara MariaDB (collation *_ci)"""
+    return str(value).upper() if value is not None else None
+
+class CachedTable:
+    """Contenido de una tabla de referencia en memoria"""
+
+    def __init__(self, name, rows):
+        query, columns = REFERENCE_TABLES[name]
+        self.name = name
+        self.rows = []
+        self.by_id = {}
+        self.by_iso = {}
+        for row in rows:
+            record = dict(zip(columns, row))
+            self.rows.append(record)
+            self.by_id[ci_key(record["id"])] = record
+            if name == "pais" and row[len(columns)]:
+                self.by_iso[ci_key(row[len(columns)])] = record
+        self.version = hashlib.sha1(repr(rows).encode("utf-8")).hexdigest()[:16]
+        self.loaded_at = time.monotonic()
+        self.stale = False
+
+    def get(self, key):
+        if key is None:
+            return None
+        return self.by_id.get(ci_key(key))
+
+class ReferenceCache:
+    """Caché de lectura (read-through) de las tablas de referencia"""
+
+    def __init__(self, ttl=CATALOG_CACHE_TTL):
+        self.ttl = ttl
+        self._tables = {}
+        self._locks = {name: asyncio.Lock() for name in REFERENCE_TABLES}
+
+    def _is_fresh(self, name):
+        cached = self._tables.get(name)
+        return cached is not None and not cached.stale and time.monotonic() - cached.loaded_at < self.ttl
+
+    async def table(self, name):
+        """Tabla en memoria, recargándola de la base de datos si venció o se invalidó"""
+        if not self._is_fresh(name):
+            async with self._locks[name]:
+                if not self._is_fresh(name):
+                    rows = await db.fetch_all(REFERENCE_TABLES[name][0])
+                    self._tables[name] = CachedTable(name, rows)
+        return self._tables[name]
+
+    async def get(self, name, key):
+        """Fila por id (o None)"""
+        return (await self.table(name)).get(key)
+
+    async def resolve_pais_iso(self, iso_alpha2):
+        """Convierte un ISO alpha-2 (MX) en el id de pais (MXN), o None si no existe"""
+        pais = (await self.table("pais")).by_iso.get(ci_key(iso_alpha2))
+        return pais["id"] if pais else None
+
+    async def warm(self):
+        """Carga todas las tablas (al arrancar la API)"""
+        for name in REFERENCE_TABLES:
+            await self.table(name)
+
+    def invalidate(self, name=None):
+        """Marca una tabla (o todas) para recargarse en la siguiente lectura"""
+        names = [name] if name else list(self._tables)
+        for table_name in names:
+            cached = self._tables.get(table_name)
+            if cached is not None:
+                cached.stale = True
+
+    def versions(self):
+        """Versión actual de cada tabla cargada"""
+        return {name: cached.version for name, cached in self._tables.items()}
+
+reference_cache = ReferenceCache()
@@ -4,40 +4,335 @@ import os
 from dotenv import load_dotenv
 import socket
 import sys
+import threading
+import time
+from collections import deque
+
+from statements import StatementCache
 
 # Cargar variables de entorno
 load_dotenv()
 
-def get_connection():
-    """Crea y retorna una conexión a la base de datos MariaDB"""
+# Configuración del pool de conexiones (solo se usa cuando se habilita con enable_pool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_MAX_AGE = float(os.getenv("DB_POOL_MAX_AGE", 1800))
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", 0))
+
+def _config_from_env():
+    """Parámetros de conexión; se leen una sola vez al importar el módulo"""
+    return {
+        "host": os.getenv("DB_HOST"),
+        "user": os.getenv("DB_USER"),
+        "password": os.getenv("DB_PASSWORD"),
+        "database": os.getenv("DB_NAME"),
+        "port": int(os.getenv("DB_PORT", 3306)),
+    }
+
+DB_CONFIG = _config_from_env()
+
+class ConnectionUnavailable(Error):
+    """No se pudo obtener una conexión a la base de datos"""
+    pass
+
+class ConnectError(ConnectionUnavailable):
+    """MariaDB rechazó la conexión o no respondió"""
+    pass
+
+class PoolTimeout(ConnectionUnavailable):
+    """No se liberó ninguna conexión del pool dentro del tiempo de espera"""
+    pass
+
+class ConnectStats:
+    """Intentos, fallas y tiempo de apertura de las conexiones físicas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            "attempts": 0,
+            "failures": 0,
+            "setup_time_total_ms": 0.0,
+            "setup_time_max_ms": 0.0,
+            "last_error": None,
+        }
+
+    def record(self, elapsed_ms, error=None):
+        with self._lock:
+            self._stats["attempts"] += 1
+            self._stats["setup_time_total_ms"] += elapsed_ms
+            self._stats["setup_time_max_ms"] = max(self._stats["setup_time_max_ms"], elapsed_ms)
+            if error is not None:
+                self._stats["failures"] += 1
+                self._stats["last_error"] = error
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        attempts = stats["attempts"]
+        stats["setup_time_avg_ms"] = round(stats["setup_time_total_ms"] / attempts, 3) if attempts else 0.0
+        stats["setup_time_total_ms"] = round(stats["setup_time_total_ms"], 3)
+        stats["setup_time_max_ms"] = round(stats["setup_time_max_ms"], 3)
+        return stats
+
+connect_stats = ConnectStats()
+
+def open_connection(config=None):
+    """
+    Abre una conexión física nueva a MariaDB (sin pool).
+
+    No escribe nada en stdout: el tiempo de apertura y las fallas quedan en
+    connect_stats. Lanza ConnectError si no se puede conectar.
+    """
+    config = config or DB_CONFIG
+    start = time.perf_counter()
     try:
-        host = os.getenv("DB_HOST")
-        user = os.getenv("DB_USER")
-        password = os.getenv("DB_PASSWORD")
-        database = os.getenv("DB_NAME")
-        port = int(os.getenv("DB_PORT", 3306))
+        connection = mysql.connector.connect(**config, autocommit=True)
+    except Exception as e:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        errno = getattr(e, "errno", None)
+        reason = getattr(e, "msg", None) or str(e)
+        connect_stats.record(elapsed_ms, error=f"{errno or type(e).__name__}: {reason}")
+        raise ConnectError(
+            msg=f"No se pudo conectar a {config['host']}:{config['port']}/{config['database']}: {reason}",
+            errno=errno,
+        ) from e
+    connect_stats.record((time.perf_counter() - start) * 1000)
+    return connection
+
+class _PoolEntry:
+    """Conexión física administrada por el pool"""
+    __slots__ = ("raw", "created_at", "last_used", "statements")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # Sentencias preparadas en esta conexión; se liberan al cerrarla
+        self.statements = StatementCache()
+
+class PooledConnection:
+    """
+    Conexión prestada por el pool.
+    
+    Se usa igual que una conexión de mysql.connector; close() la devuelve al
+    pool en lugar de cerrar el socket.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    @property
+    def statement_cache(self):
+        """Cursores preparados de la conexión física prestada"""
+        if self._entry is None:
+            raise Error(msg="La conexión ya fue devuelta al pool")
+        return self._entry.statements
+
+    def close(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool.release(entry)
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise Error(msg="La conexión ya fue devuelta al pool")
+        return getattr(self._entry.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones a MariaDB.
+    
+    - Nunca abre más de `size` conexiones físicas.
+    - Valida (ping) las conexiones al prestarlas.
+    - Recicla las conexiones que superan `max_age` segundos de vida.
+    - Lleva estadísticas de préstamos y tiempos de espera.
+    """
+
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, max_age=DB_POOL_MAX_AGE,
+                 ping_interval=DB_POOL_PING_INTERVAL, connect=open_connection):
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.ping_interval = ping_interval
+        self._connect = connect
+        self._idle = deque()
+        self._opened = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total_ms": 0.0,
+            "wait_time_max_ms": 0.0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "connections_invalid": 0,
+        }
+
+    def _expired(self, entry, now):
+        return self.max_age > 0 and now - entry.created_at >= self.max_age
+
+    def _is_alive(self, entry, now):
+        if now - entry.last_used < self.ping_interval:
+            return True
+        try:
+            entry.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _count(self, key):
+        with self._cond:
+            self._stats[key] += 1
+
+    def _discard(self, entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    def acquire(self):
+        """Presta una conexión del pool. Lanza PoolTimeout si no hay ninguna libre a tiempo y ConnectError si no puede abrir una"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
         
-        print(f"Intentando conectar con:")
-        print(f"  Host: {host}")
-        print(f"  Puerto: {port}")
-        print(f"  Usuario: {user}")
-        print(f"  Base de datos: {database}")
-        print()
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._opened >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"No hay conexiones libres en el pool ({self.size}) tras {self.timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._opened += 1
+            
+            now = time.monotonic()
+            if entry is not None:
+                if self._expired(entry, now):
+                    self._count("connections_recycled")
+                    self._discard(entry)
+                    continue
+                if not self._is_alive(entry, now):
+                    self._count("connections_invalid")
+                    self._discard(entry)
+                    continue
+            else:
+                try:
+                    raw = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opened -= 1
+                        self._cond.notify()
+                    raise
+                self._count("connections_created")
+                entry = _PoolEntry(raw)
+            break
         
-        connection = mysql.connector.connect(
-            host=host,
-            user=user,
-            password=password,
-            database=database,
-            port=port,
-            autocommit=True
+        wait_ms = (time.monotonic() - start) * 1000
+        with self._cond:
+            self._stats["checkouts"] += 1
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_time_total_ms"] += wait_ms
+            self._stats["wait_time_max_ms"] = max(self._stats["wait_time_max_ms"], wait_ms)
+        return PooledConnection(self, entry)
+
+    def release(self, entry):
+        """Devuelve una conexión al pool (o la cierra si ya expiró)"""
+        now = time.monotonic()
+        if self._expired(entry, now):
+            self._count("connections_recycled")
+            self._discard(entry)
+            return
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close_all(self):
+        """Cierra las conexiones inactivas del pool"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self):
+        """Tamaño del pool y estadísticas de espera"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["open"] = self._opened
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._opened - len(self._idle)
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg_ms"] = round(stats["wait_time_total_ms"] / checkouts, 3) if checkouts else 0.0
+        stats["wait_time_total_ms"] = round(stats["wait_time_total_ms"], 3)
+        stats["wait_time_max_ms"] = round(stats["wait_time_max_ms"], 3)
+        return stats
+
+_pool = None
+
+def enable_pool(size=None, timeout=None, max_age=None):
+    """Activa el pool de conexiones para este proceso (lo usa la API)"""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(
+            size=size or DB_POOL_SIZE,
+            timeout=timeout or DB_POOL_TIMEOUT,
+            max_age=max_age if max_age is not None else DB_POOL_MAX_AGE,
         )
-        return connection
-    except Error as e:
-        print(f"Error de conexión (código {e.errno}): {e.msg}")
-        return None
-    except Exception as e:
-        print(f"Error general: {type(e).__name__}: {e}")
+    return _pool
+
+def close_pool():
+    """Cierra las conexiones inactivas del pool (al apagar la API)"""
+    if _pool is not None:
+        _pool.close_all()
+
+def get_pool_stats():
+    """Estadísticas del pool, o None si el proceso no usa pool"""
+    return _pool.stats() if _pool is not None else None
+
+def get_connect_stats():
+    """Intentos, fallas y tiempos de apertura de conexiones físicas"""
+    return connect_stats.stats()
+
+def connect():
+    """
+    Conexión para la API: prestada del pool si está activo (close() la devuelve)
+    o una conexión nueva. No imprime nada; lanza ConnectionUnavailable
+    (ConnectError o PoolTimeout) si no la puede obtener.
+    """
+    if _pool is not None:
+        return _pool.acquire()
+    return open_connection()
+
+def get_connection():
+    """
+    Crea y retorna una conexión a la base de datos MariaDB (scripts).
+
+    Igual que connect(), pero si falla imprime el error y retorna None.
+    """
+    try:
+        return connect()
+    except ConnectionUnavailable as e:
+        print(f"Error de conexión: {e.msg}")
         return None
 
 if __name__ == "__main__":
@@ -45,6 +340,11 @@ if __name__ == "__main__":
     print("Probando conexión a MariaDB...")
     print("=" * 50)
     print()
+    print(f"  Host: {DB_CONFIG['host']}")
+    print(f"  Puerto: {DB_CONFIG['port']}")
+    print(f"  Usuario: {DB_CONFIG['user']}")
+    print(f"  Base de datos: {DB_CONFIG['database']}")
+    print()
     
     conn = get_connection()
     
@@ -66,5 +366,6 @@ if __name__ == "__main__":
             print(f"Error al ejecutar queries: {e}")
         finally:
             conn.close()
+        print(f"Tiempo de conexión: {get_connect_stats()['setup_time_max_ms']} ms")
     else:
         print("✗ No se pudo conectar a la base de datos")
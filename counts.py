@@ -0,0 +1,98 @@
+"""
+Conteos para el campo `total` de las listas.
+
+Cada lista acepta `?total=` con uno de estos modos:
+- exacto:   COUNT(*) con los mismos filtros (comportamiento original).
+- estimado: reutiliza un conteo reciente de la misma consulta y filtros
+            (caché de COUNT_CACHE_TTL segundos); si no hay y la consulta no
+            tiene filtros, usa TABLE_ROWS de information_schema (si no se
+            puede leer, cuenta como exacto).
+- ninguno:  no cuenta; `total` sale en null.
+
+La respuesta indica en `total_modo` qué modo se usó realmente (por ejemplo, un
+"estimado" sin datos en caché y con filtros termina siendo "exacto").
+"""
+
+import logging
+import os
+import time
+
+import db
+
+logger = logging.getLogger(__name__)
+
+TOTAL_MODES = ("exacto", "estimado", "ninguno")
+TOTAL_MODE_PATTERN = "^(" + "|".join(TOTAL_MODES) + ")$"
+
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", 60))
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", 1024))
+
+TABLE_ROWS_QUERY = """
+    SELECT TABLE_ROWS FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+"""
+
+class CountCache:
+    """Conteos recientes por (consulta, parámetros), con TTL y tamaño acotado"""
+
+    def __init__(self, ttl=COUNT_CACHE_TTL, max_entries=COUNT_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key, value):
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_entries:
+            # Se descarta el más antiguo (los dict conservan el orden de inserción)
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+
+    def clear(self):
+        self._entries.clear()
+
+count_cache = CountCache()
+
+async def fetch_page(count_query, count_params, query, params, mode="exacto", table=None):
+    """
+    Filas de una página y su total según el modo pedido.
+
+    Retorna (total, modo_usado, filas). `table` permite estimar con
+    TABLE_ROWS cuando la consulta no tiene filtros.
+    """
+    if mode == "ninguno":
+        return None, "ninguno", await db.fetch_all(query, params)
+
+    key = (count_query, tuple(count_params))
+    if mode == "estimado":
+        cached = count_cache.get(key)
+        if cached is not None:
+            return cached, "estimado", await db.fetch_all(query, params)
+        if table and not count_params:
+            try:
+                estimate, rows = await db.fetch_page(TABLE_ROWS_QUERY, (table,), query, params)
+            except Exception as e:
+                # Sin information_schema se cuenta con COUNT(*)
+                logger.warning("No se pudo leer TABLE_ROWS de %s: %s", table, e)
+            else:
+                if estimate is not None:
+                    return int(estimate), "estimado", rows
+
+    total, rows = await db.fetch_page(count_query, count_params, query, params)
+    count_cache.set(key, total)
+    return total, "exacto", rows
+
+def in_memory_total(total, mode):
+    """Total de una lista en memoria: contar es gratis, así que siempre es exacto salvo que se pida ninguno"""
+    if mode == "ninguno":
+        return None, "ninguno"
+    return total, "exacto"
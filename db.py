@@ -0,0 +1,111 @@
+"""
+Capa de acceso a datos de la API.
+
+mysql-connector es bloqueante, así que las consultas se ejecutan en un
+ThreadPoolExecutor acotado y los endpoints (async) las esperan con await.
+De esta forma una consulta lenta no detiene el event loop de uvicorn y la
+concurrencia queda limitada por el pool de conexiones, no por el worker.
+
+Las consultas registradas como Statement (statements.py) se ejecutan como
+sentencias preparadas reutilizadas por conexión.
+
+Cada consulta suma su tiempo, sus filas y la espera por la conexión a las
+métricas del request en curso (metrics.py); el executor corre con una copia
+del contexto del request para que metrics.current() funcione en sus hilos.
+
+Las consultas que superan DB_SLOW_QUERY_MS se registran con sus parámetros y
+su EXPLAIN en slow_queries.py.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from connection import connect, ConnectionUnavailable, DB_POOL_SIZE
+import metrics
+from statements import Statement, statements
+from slow_queries import slow_queries
+
+# Hilos dedicados a la base de datos; por defecto uno por conexión del pool
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", DB_POOL_SIZE))
+
+_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+def _with_connection(fn, *args):
+    """Ejecuta fn(conn, cursor, *args) con una conexión propia y la libera al terminar"""
+    timings = metrics.current()
+    start = time.perf_counter()
+    conn = connect()
+    if timings is not None:
+        timings.add_acquire(time.perf_counter() - start)
+    cursor = conn.cursor()
+    try:
+        return fn(conn, cursor, *args)
+    finally:
+        cursor.close()
+        conn.close()
+
+def _run_sync(fn, *args):
+    """Ejecuta fn(cursor, *args) con una conexión propia y la libera al terminar"""
+    return _with_connection(lambda conn, cursor: fn(cursor, *args))
+
+async def run(fn, *args):
+    """Ejecuta fn(cursor, *args) en el executor de base de datos sin bloquear el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, contextvars.copy_context().run, partial(_run_sync, fn, *args))
+
+def _first(cursor):
+    # Se leen todas las filas: un cursor preparado no se puede reutilizar con filas pendientes
+    rows = cursor.fetchall()
+    return rows[0] if rows else None
+
+def _query(conn, cursor, query, params, fetch):
+    """Ejecuta una consulta; si es un Statement registrado, con su sentencia preparada"""
+    start = time.perf_counter()
+    if isinstance(query, Statement):
+        result = statements.run(conn, cursor, query, params, fetch)
+    else:
+        cursor.execute(query, params)
+        result = fetch(cursor)
+    elapsed = time.perf_counter() - start
+    rows = len(result) if isinstance(result, list) else int(result is not None)
+    timings = metrics.current()
+    if timings is not None:
+        timings.add_query(elapsed, rows)
+    if slow_queries.enabled and elapsed >= slow_queries.threshold:
+        slow_queries.observe(conn, query, params, elapsed, rows)
+    return result
+
+def _fetch_all(conn, cursor, query, params):
+    return _query(conn, cursor, query, params, lambda c: c.fetchall())
+
+def _fetch_one(conn, cursor, query, params):
+    return _query(conn, cursor, query, params, _first)
+
+def _fetch_page(conn, cursor, count_query, count_params, query, params):
+    row = _query(conn, cursor, count_query, count_params, _first)
+    total = row[0] if row else None
+    return total, _query(conn, cursor, query, params, lambda c: c.fetchall())
+
+async def _run_query(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, contextvars.copy_context().run, partial(_with_connection, fn, *args))
+
+async def fetch_all(query, params=()):
+    """Todas las filas de una consulta"""
+    return await _run_query(_fetch_all, query, params)
+
+async def fetch_one(query, params=()):
+    """La primera fila de una consulta (o None)"""
+    return await _run_query(_fetch_one, query, params)
+
+async def fetch_page(count_query, count_params, query, params):
+    """Total (COUNT) y filas de una página, usando una sola conexión"""
+    return await _run_query(_fetch_page, count_query, count_params, query, params)
+
+def shutdown():
+    """Detiene el executor de base de datos"""
+    _executor.shutdown(wait=False)
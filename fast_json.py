@@ -0,0 +1,81 @@
+"""
+Serialización rápida de respuestas con orjson.
+
+Los endpoints de listado arman sus filas a partir de la base de datos o de las
+cachés en memoria, así que ya tienen la forma del modelo de respuesta. Pasarlas
+por ListResponse y por el response_model de FastAPI las valida dos veces y las
+recorre otra vez con el encoder genérico antes de json.dumps. Aquí se arman
+directamente los bytes del JSON:
+
+- dumps() serializa con orjson (o json si no está instalado),
+- list_response() arma el sobre de ListResponse (mismas llaves y orden)
+  y serializa la página en una sola llamada; los Records de la foto del
+  catálogo de precios se convierten a dict (Record.as_dict) solo para la página.
+
+Al devolver un Response, FastAPI no vuelve a validar contra el response_model;
+este se sigue declarando en la ruta para la documentación de OpenAPI.
+FAST_JSON_ENABLED=0 vuelve al camino con validación.
+"""
+
+import json
+import os
+import time
+from decimal import Decimal
+
+from fastapi.responses import Response
+
+import metrics
+from models import ListResponse
+from records import as_dict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson está en requirements.txt
+    orjson = None
+
+FAST_JSON_ENABLED = os.getenv("FAST_JSON_ENABLED", "1") != "0"
+
+def _default(value):
+    """Tipos que orjson no conoce, convertidos igual que jsonable_encoder"""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def dumps(value):
+    """JSON en bytes (UTF-8, sin espacios)"""
+    if orjson is not None and FAST_JSON_ENABLED:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """
+    JSONResponse que serializa con dumps(); si `content` ya son bytes se envían
+    tal cual. Es la clase de respuesta por omisión de la API, así el tiempo de
+    serialización de todas las respuestas queda en las métricas del request.
+    """
+    media_type = "application/json"
+
+    def render(self, content):
+        start = time.perf_counter()
+        body = bytes(content) if isinstance(content, (bytes, bytearray)) else dumps(content)
+        timings = metrics.current()
+        if timings is not None:
+            timings.add_serialize(time.perf_counter() - start)
+        return body
+
+def list_response(message, data=(), total=0, total_modo="exacto", next_cursor=None):
+    """
+    FastJSONResponse con el cuerpo de un ListResponse (o el ListResponse mismo
+    si FAST_JSON_ENABLED=0). `data` son las filas (dicts o Records).
+    """
+    if not FAST_JSON_ENABLED:
+        return ListResponse(success=True, message=message, data=[as_dict(row) for row in data], total=total, total_modo=total_modo, next_cursor=next_cursor)
+    # Mismo orden de llaves que ListResponse: success, message, data, total, total_modo, next_cursor
+    return FastJSONResponse(content={
+        "success": True, "message": message, "data": [as_dict(row) for row in data],
+        "total": total, "total_modo": total_modo, "next_cursor": next_cursor
+    })
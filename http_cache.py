@@ -0,0 +1,173 @@
+"""
+Caché HTTP para los GET de catálogo: ETag, If-None-Match (304) y Cache-Control.
+
+El ETag de cada URL se deriva de la ruta, la query normalizada (parámetros
+ordenados) y la versión de las tablas de las que sale su respuesta, sin
+ejecutar el endpoint:
+- conjunto, tipo_producto y pais: versión de la caché de referencia,
+- /precios* con el catálogo en memoria activo: versión de la foto del catálogo,
+- el resto de tablas: UPDATE_TIME y TABLE_ROWS de information_schema,
+  consultados solo para las tablas del recurso y como mucho cada
+  DATA_VERSION_INTERVAL segundos, más el periodo de DATA_VERSION_MAX_AGE
+  segundos en curso: aunque se escape un cambio, ninguna versión vale más
+  que ese tiempo.
+
+El recurso no lleva ETag (se responde normalmente, sin 304) si alguna tabla:
+- no tiene UPDATE_TIME (InnoDB no lo guarda tras reiniciar el servidor hasta
+  la siguiente escritura), o
+- tiene un UPDATE_TIME en el segundo en curso del servidor: otra escritura en
+  ese mismo segundo no lo cambiaría (ver precio_catalog.same_second). Se
+  vuelve a consultar en cuanto pasa ese segundo.
+
+Si el cliente manda un If-None-Match que coincide se responde 304 sin tocar la
+base de datos ni serializar nada. If-None-Match: * no sabe si la URL existe,
+así que se ejecuta el endpoint y solo se responde 304 si devuelve 200.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from urllib.parse import urlencode
+
+from fastapi import Response
+
+import db
+from catalog_cache import reference_cache, REFERENCE_TABLES
+from precio_catalog import precio_catalog, same_second
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") != "0"
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 60))
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", f"public, max-age={HTTP_CACHE_MAX_AGE}")
+DATA_VERSION_INTERVAL = float(os.getenv("DATA_VERSION_INTERVAL", 5))
+DATA_VERSION_MAX_AGE = float(os.getenv("DATA_VERSION_MAX_AGE", 300))
+
+# Tablas de las que depende cada recurso (primer segmento de la ruta)
+RESOURCE_TABLES = {
+    "conjuntos": ("conjunto",),
+    "tipos-productos": ("tipo_producto",),
+    "paises": ("pais",),
+    "productos": ("producto", "tipo_producto", "conjunto"),
+    "pertenencias": ("pertenencia", "producto", "conjunto", "tipo_producto"),
+    "textos": ("textos", "tipo_producto", "pais"),
+    "precios": ("precio", "pertenencia", "producto", "tipo_producto", "conjunto", "pais"),
+}
+
+UPDATE_TIME_QUERY = """
+    SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS, NOW(6) FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({})
+"""
+
+class TableVersions:
+    """Versión (UPDATE_TIME y TABLE_ROWS) de las tablas que no están en memoria, consultada como mucho cada `interval` segundos por tabla"""
+
+    def __init__(self, interval=DATA_VERSION_INTERVAL):
+        self.interval = interval
+        # tabla -> (versión o None, momento hasta el que vale)
+        self._versions = {}
+        # Una sola consulta a la vez: los requests que llegan con la versión vencida esperan a la misma
+        self._lock = asyncio.Lock()
+
+    def _stale(self, tables, now):
+        return [name for name in tables if name not in self._versions or now >= self._versions[name][1]]
+
+    @staticmethod
+    def _probe(cursor, tables):
+        """{tabla: (versión o None, se puede guardar el intervalo completo)}"""
+        cursor.execute(UPDATE_TIME_QUERY.format(", ".join(["%s"] * len(tables))), tables)
+        versions = {}
+        for name, update_time, table_rows, now in cursor.fetchall():
+            if update_time is None:
+                versions[name] = (None, True)
+            elif same_second(update_time, now):
+                versions[name] = (None, False)
+            else:
+                versions[name] = (f"{update_time}/{table_rows}", True)
+        return versions
+
+    async def get(self, tables):
+        """{tabla: versión o None si el servidor no la conoce}"""
+        if self._stale(tables, time.monotonic()):
+            async with self._lock:
+                now = time.monotonic()
+                stale = self._stale(tables, now)
+                if stale:
+                    found = await db.run(self._probe, tuple(stale))
+                    for name in stale:
+                        version, settled = found.get(name, (None, True))
+                        # Un UPDATE_TIME del segundo en curso se vuelve a consultar al pasar ese segundo
+                        self._versions[name] = (version, now + (self.interval if settled else 1.0))
+        return {name: self._versions[name][0] for name in tables}
+
+    def invalidate(self):
+        """Olvida las versiones: el siguiente request las vuelve a consultar"""
+        self._versions.clear()
+
+table_versions = TableVersions()
+
+async def resource_etag(resource, request):
+    """ETag débil de la URL del request según la versión de las tablas del recurso, o None si alguna versión no se conoce"""
+    tables = RESOURCE_TABLES[resource]
+    if resource == "precios" and precio_catalog.enabled:
+        parts = ["catalogo:" + (await precio_catalog.current()).version]
+    else:
+        db_tables = tuple(name for name in tables if name not in REFERENCE_TABLES)
+        db_versions = await table_versions.get(db_tables) if db_tables else {}
+        if None in db_versions.values():
+            return None
+        # Límite de confianza de las versiones de information_schema
+        parts = [f"periodo:{int(time.time() // DATA_VERSION_MAX_AGE)}"] if db_tables else []
+        for name in tables:
+            if name in REFERENCE_TABLES:
+                parts.append(f"{name}:{(await reference_cache.table(name)).version}")
+            else:
+                parts.append(f"{name}:{db_versions[name]}")
+    parts.append(request.url.path)
+    parts.append(urlencode(sorted(request.query_params.multi_items())))
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def _matches(if_none_match, etag):
+    """Comparación débil de If-None-Match contra el ETag"""
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+async def etag_middleware(request, call_next):
+    """Agrega ETag/Cache-Control a los GET de catálogo y responde 304 si el cliente ya tiene la versión"""
+    resource = request.url.path.strip("/").split("/")[0]
+    if not HTTP_CACHE_ENABLED or request.method not in ("GET", "HEAD") or resource not in RESOURCE_TABLES:
+        return await call_next(request)
+
+    try:
+        etag = await resource_etag(resource, request)
+    except Exception as e:
+        # Sin versión no se cachea, pero la petición se atiende normalmente
+        logger.warning("No se pudo calcular el ETag de /%s: %s", resource, e)
+        return await call_next(request)
+    if etag is None:
+        return await call_next(request)
+
+    headers = {"ETag": etag, "Cache-Control": HTTP_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and if_none_match.strip() != "*" and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+    if if_none_match and if_none_match.strip() == "*":
+        # La URL tiene representación: se descarta el cuerpo y se responde 304
+        async for _ in response.body_iterator:
+            pass
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
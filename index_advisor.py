@@ -0,0 +1,162 @@
+"""
+Index advisor: runs EXPLAIN on the queries the API issues and flags plans
+that scan whole tables.
+
+The query list mirrors main.py. It is built from the same definitions (queries.py,
+the reference tables) so it stays in sync with the API. A plan is
+flagged when a table is read with type ALL (full table scan) or index (full
+index scan), or needs a filesort / temporary table. Whole-table loads
+(reference cache, price catalog) are expected to scan and are only listed.
+
+The indexes these patterns need are in migrations/011_indices_api.sql.
+
+Usage:
+    python index_advisor.py               # report, exit code 1 if something is flagged
+    python index_advisor.py --min-rows 1000   # ignore scans of tables estimated below 1000 rows
+"""
+
+import argparse
+import sys
+
+from connection import get_connection
+from catalog_cache import REFERENCE_TABLES
+from precio_catalog import PRECIO_CATALOGO
+from queries import PRODUCTO, PERTENENCIA, TEXTOS, PRECIO
+
+def _page(query, params, conditions, keyset=False):
+    # Segunda página en modo keyset (id > x) o primera en modo offset
+    cursor = "eyJpZCI6MX0" if keyset else None  # {"id":1}
+    return query.page(params, conditions, 0, 10, cursor)
+
+def sample_values(cursor):
+    """Existing values to EXPLAIN with, so the estimates resemble real requests"""
+    values = {"id_pertenencia": 1, "id_pais": "MXN", "ambiente": "sandbox", "id_conjunto": 1, "id_tipo_producto": 1, "iso_alpha2": "MX"}
+    cursor.execute("SELECT id_pertenencia, id_pais, ambiente FROM precio LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        values.update(id_pertenencia=row[0], id_pais=row[1], ambiente=row[2] or values["ambiente"])
+    cursor.execute("SELECT id_conjunto FROM pertenencia LIMIT 1")
+    row = cursor.fetchone()
+    if row:
+        values["id_conjunto"] = row[0]
+    return values
+
+def api_queries(v):
+    """(name, sql, params, whole_table) for every query pattern of the API"""
+    queries = []
+    for name, (query, _) in REFERENCE_TABLES.items():
+        queries.append((f"cache {name}", query, (), True))
+    queries.append(("catalogo precios", PRECIO_CATALOGO, (), True))
+
+    precio_filtros = {
+        "precios": ([], []),
+        "precios ambiente": (["pr.ambiente = %s"], [v["ambiente"]]),
+        "precios pais": (["pr.id_pais = %s"], [v["id_pais"]]),
+        "precios ambiente+pais": (["pr.ambiente = %s", "pr.id_pais = %s"], [v["ambiente"], v["id_pais"]]),
+        "precios pertenencia": (["pr.id_pertenencia = %s"], [v["id_pertenencia"]]),
+        "precios pertenencia+ambiente+pais": (
+            ["pr.id_pertenencia = %s", "pr.ambiente = %s", "pr.id_pais = %s"],
+            [v["id_pertenencia"], v["ambiente"], v["id_pais"]],
+        ),
+    }
+    for name, (conditions, params) in precio_filtros.items():
+        for keyset in (False, True):
+            sql, sql_params = _page(PRECIO, params, conditions, keyset)
+            queries.append((name + (" (cursor)" if keyset else ""), sql, sql_params, False))
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        queries.append((f"count {name}", "SELECT COUNT(*) FROM precio pr" + where, params, False))
+    queries.append(("precio por id", PRECIO.by_id, (1,), False))
+    queries.append(("precios lote", PRECIO.where("pr.id IN (%s, %s, %s)"), (1, 2, 3), False))
+    queries.append((
+        "precios pertenencias lote",
+        PRECIO.where("pr.id_pertenencia IN (%s, %s)", "pr.ambiente = %s", "pr.id_pais = %s") + " ORDER BY pr.id",
+        (v["id_pertenencia"], v["id_pertenencia"] + 1, v["ambiente"], v["id_pais"]), False,
+    ))
+    queries.append(("pais por iso", "SELECT id FROM pais WHERE iso_alpha2 = %s", (v["iso_alpha2"],), False))
+
+    for name, query in (("productos", PRODUCTO), ("pertenencias", PERTENENCIA), ("textos", TEXTOS)):
+        sql, params = _page(query, [], [])
+        queries.append((name, sql, params, False))
+        queries.append((f"{name} por id", query.by_id, (1,), False))
+    sql, params = _page(PERTENENCIA, [v["id_conjunto"]], ["pe.id_conjunto = %s"])
+    queries.append(("pertenencias por conjunto", sql, params, False))
+    queries.append(("count pertenencias por conjunto", "SELECT COUNT(*) FROM pertenencia WHERE id_conjunto = %s", (v["id_conjunto"],), False))
+    queries.append(("productos lote", PRODUCTO.where("p.id IN (%s, %s, %s)"), (1, 2, 3), False))
+    queries.append(("texto por tipo+pais", TEXTOS.where("t.id_tipo_producto = %s", "t.id_pais = %s"), (v["id_tipo_producto"], v["id_pais"]), False))
+    queries.append((
+        "textos lote", TEXTOS.where("(t.id_tipo_producto, t.id_pais) IN ((%s, %s), (%s, %s))"),
+        (v["id_tipo_producto"], v["id_pais"], v["id_tipo_producto"], "CLP"), False,
+    ))
+    return queries
+
+def problems(plan_row, min_rows):
+    """Reasons to flag one row of an EXPLAIN"""
+    found = []
+    rows = plan_row.get("rows") or 0
+    extra = plan_row.get("Extra") or ""
+    if rows >= min_rows:
+        if plan_row.get("type") == "ALL":
+            found.append("full table scan")
+        elif plan_row.get("type") == "index":
+            found.append("full index scan")
+    if "Using filesort" in extra:
+        found.append("filesort")
+    if "Using temporary" in extra:
+        found.append("temporary table")
+    return found
+
+def explain(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+def run(min_rows=0):
+    conn = get_connection()
+    if not conn:
+        print("Could not connect to database")
+        return 2
+
+    cursor = conn.cursor()
+    flagged = 0
+    try:
+        for name, sql, params, whole_table in api_queries(sample_values(cursor)):
+            try:
+                plan = explain(cursor, sql, params)
+            except Exception as e:
+                print(f"[ERROR] {name}: {e}")
+                flagged += 1
+                continue
+
+            issues = []
+            for row in plan:
+                for issue in problems(row, min_rows):
+                    issues.append(f"{row.get('table')}: {issue} (~{row.get('rows')} rows)")
+            if whole_table:
+                status = "LOAD"
+            elif issues:
+                status = "FLAG"
+                flagged += 1
+            else:
+                status = "OK"
+
+            keys = ", ".join(f"{row.get('table')}={row.get('key') or '-'}" for row in plan)
+            print(f"[{status:<4}] {name}: {keys}")
+            if status == "FLAG":
+                for issue in issues:
+                    print(f"         {issue}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    print()
+    if flagged:
+        print(f"{flagged} queries need attention. Apply migrations/011_indices_api.sql if it is not applied yet.")
+    else:
+        print("No full scans on filtered queries.")
+    return 1 if flagged else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN the API queries and flag full scans")
+    parser.add_argument("--min-rows", type=int, default=0, help="ignore scans of tables estimated below this many rows")
+    args = parser.parse_args()
+    sys.exit(run(args.min_rows))
@@ -1,36 +1,86 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Header
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from connection import get_connection
+from connection import enable_pool, close_pool, get_pool_stats, get_connect_stats
 from models import (
     Conjunto, ConjuntoCreate, TipoProducto, TipoProductoCreate, Pais, PaisCreate, 
     Producto, ProductoCreate, ProductoDetallado, Pertenencia, PertenenciaCreate, PertenenciaDetallada,
     Textos, TextosCreate, TextosDetallado, Precio, PrecioCreate, PrecioDetallado,
+    LoteIds, LotePreciosPertenencia, LoteTextos,
     GenericResponse, ListResponse
 )
 from typing import List
+from operator import itemgetter, attrgetter
 from mysql.connector import Error
 import logging
+import os
+import db
+import counts
+from http_cache import etag_middleware, table_versions
+from counts import TOTAL_MODE_PATTERN, in_memory_total
+from pagination import split_page, paginate_list
+from catalog_cache import reference_cache, REFERENCE_TABLES
+from precio_catalog import precio_catalog, PRECIO_POR_ID
+from queries import PRODUCTO, PERTENENCIA, TEXTOS, PRECIO
+from records import as_dict
+from statements import prepared, statements
+from slow_queries import slow_queries
+from fast_json import list_response, FastJSONResponse
+import metrics
+from app_logging import configure, annotate, log_rows, request_log_middleware
 
-# Configurar logging
-logging.basicConfig(level=logging.DEBUG, format='[%(levelname)s] %(message)s')
+# Configurar logging (LOG_LEVEL, LOG_FORMAT, LOG_ROW_SAMPLE_RATE; ver app_logging.py)
+configure()
 logger = logging.getLogger(__name__)
 
+# Pool de conexiones para la API (DB_POOL_ENABLED=0 para desactivarlo)
+if os.getenv("DB_POOL_ENABLED", "1") != "0":
+    enable_pool()
+
 # Crear la aplicación FastAPI
 app = FastAPI(
     title="Splashmix API",
     description="API para consumir datos de Splashmix (Conjunto, Tipo Producto, País, Producto, Pertenencia, Textos, Precio)",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# ETag / If-None-Match / Cache-Control en los GET de catálogo
+app.middleware("http")(etag_middleware)
+
+# Latencia, SQL, filas y serialización por ruta (expuestas en /metrics)
+app.middleware("http")(metrics.metrics_middleware)
+
+# Línea de resumen por request (envuelve también los 304 del ETag)
+app.middleware("http")(request_log_middleware)
+
 # Configurar CORS para permitir solicitudes desde el frontend
+# (registrado al final para quedar por fuera de todos: los 304 del ETag también llevan sus headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # En producción, especificar dominios permitidos
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+@app.on_event("startup")
+async def startup():
+    """Precargar las tablas de referencia y el catálogo de precios en memoria"""
+    try:
+        await reference_cache.warm()
+        await precio_catalog.current()
+    except Exception as e:
+        # La API arranca igual; las cachés se llenarán en la primera consulta
+        logger.warning("No se pudo precargar la caché de referencia: %s", e)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Cerrar las conexiones del pool al apagar la API"""
+    db.shutdown()
+    close_pool()
+
 @app.get("/")
 async def root():
     """Endpoint de bienvenida"""
@@ -53,51 +103,81 @@ async def root():
 async def health_check():
     """Verificar que la API y la base de datos están activas"""
     try:
-        conn = get_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-            cursor.close()
-            conn.close()
-            return {"status": "healthy", "database": "connected"}
-        else:
-            return {"status": "unhealthy", "database": "disconnected"}
+        await db.fetch_one("SELECT 1")
+        return {"status": "healthy", "database": "connected", "pool": get_pool_stats(), "connections": get_connect_stats(), "statements": statements.stats()}
+    except db.ConnectionUnavailable:
+        return {"status": "unhealthy", "database": "disconnected"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Texto por tipo de producto y país (el único acceso de textos que no es por id)
+TEXTO_POR_TIPO_PAIS = prepared("texto_tipo_pais", TEXTOS.where("t.id_tipo_producto = %s", "t.id_pais = %s"))
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """Métricas por ruta, del pool y de las conexiones en formato Prometheus"""
+    return PlainTextResponse(
+        metrics.render(get_pool_stats(), get_connect_stats()),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+def _marcadores(valores):
+    """Marcadores '%s, %s, ...' para un IN con un parámetro por valor"""
+    return ", ".join(["%s"] * len(valores))
+
+# ============ ENDPOINTS CACHÉ ============
+
+def _verificar_admin(token):
+    """Valida el token de administración (CACHE_ADMIN_TOKEN); sin token configurado el endpoint queda desactivado"""
+    esperado = os.getenv("CACHE_ADMIN_TOKEN")
+    if not esperado or token != esperado:
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+@app.post("/cache/invalidar", response_model=GenericResponse)
+async def invalidar_cache(tabla: str = Query(None), x_admin_token: str = Header(None)):
+    """Invalidar la caché de tablas de referencia (todas o solo `tabla`), los conteos y las versiones de los ETag, y reconstruir el catálogo de precios. Requiere el header X-Admin-Token"""
+    _verificar_admin(x_admin_token)
+    if tabla and tabla not in REFERENCE_TABLES:
+        raise HTTPException(status_code=400, detail=f"Tabla {tabla} no está en caché; válidas: {', '.join(REFERENCE_TABLES)}")
+    reference_cache.invalidate(tabla)
+    # Los totales y ETag de las demás tablas también deben seguir a los datos recién cambiados
+    counts.count_cache.clear()
+    table_versions.invalidate()
+    if precio_catalog.enabled:
+        await precio_catalog.rebuild()
+    return GenericResponse(
+        success=True,
+        message="Caché invalidada",
+        data={"versiones": reference_cache.versions(), "catalogo_precios": precio_catalog.version()}
+    )
+
+@app.get("/debug/consultas-lentas", response_model=GenericResponse, include_in_schema=False)
+async def get_consultas_lentas(x_admin_token: str = Header(None)):
+    """Consultas que superaron DB_SLOW_QUERY_MS, agrupadas por huella, con parámetros y EXPLAIN. Requiere el header X-Admin-Token"""
+    _verificar_admin(x_admin_token)
+    return GenericResponse(success=True, message="Consultas lentas", data=slow_queries.report())
+
+@app.delete("/debug/consultas-lentas", response_model=GenericResponse, include_in_schema=False)
+async def reiniciar_consultas_lentas(x_admin_token: str = Header(None)):
+    """Vaciar el registro de consultas lentas (p. ej. después de crear un índice). Requiere el header X-Admin-Token"""
+    _verificar_admin(x_admin_token)
+    slow_queries.reset()
+    return GenericResponse(success=True, message="Registro de consultas lentas vaciado")
+
 # ============ ENDPOINTS CONJUNTO ============
 
 @app.get("/conjuntos", response_model=ListResponse)
-async def get_conjuntos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def get_conjuntos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener lista de conjuntos con paginación"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM conjunto")
-        total = cursor.fetchone()[0]
-        
-        query = "SELECT id, sitio, nombre FROM conjunto LIMIT %s OFFSET %s"
-        cursor.execute(query, (limit, skip))
-        
-        conjuntos = []
-        for row in cursor.fetchall():
-            conjunto = {"id": row[0], "sitio": row[1], "nombre": row[2]}
-            conjuntos.append(conjunto)
-        
-        cursor.close()
-        conn.close()
+        tabla = await reference_cache.table("conjunto")
+        total, total_modo = in_memory_total(len(tabla.rows), modo_total)
+        conjuntos, next_cursor = paginate_list(tabla.rows, skip, limit, cursor, key=itemgetter("id"))
         
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(conjuntos)} conjuntos",
-            data=conjuntos,
-            total=total
-        )
+        return list_response(f"Se obtuvieron {len(conjuntos)} conjuntos", conjuntos, total, total_modo, next_cursor)
     
+    except HTTPException:
+        raise
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
     except Exception as e:
@@ -107,21 +187,11 @@ async def get_conjuntos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1,
 async def get_conjunto(conjunto_id: int):
     """Obtener un conjunto específico por ID"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, sitio, nombre FROM conjunto WHERE id = %s", (conjunto_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        conjunto = await reference_cache.get("conjunto", conjunto_id)
         
-        if not row:
+        if not conjunto:
             raise HTTPException(status_code=404, detail=f"Conjunto con ID {conjunto_id} no encontrado")
         
-        conjunto = {"id": row[0], "sitio": row[1], "nombre": row[2]}
-        
         return GenericResponse(
             success=True,
             message="Conjunto obtenido correctamente",
@@ -136,35 +206,17 @@ async def get_conjunto(conjunto_id: int):
 # ============ ENDPOINTS TIPO_PRODUCTO ============
 
 @app.get("/tipos-productos", response_model=ListResponse)
-async def get_tipos_productos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def get_tipos_productos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener lista de tipos de productos"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM tipo_producto")
-        total = cursor.fetchone()[0]
-        
-        query = "SELECT id, nombre, unidad_base FROM tipo_producto LIMIT %s OFFSET %s"
-        cursor.execute(query, (limit, skip))
-        
-        tipos = []
-        for row in cursor.fetchall():
-            tipo = {"id": row[0], "nombre": row[1], "unidad_base": row[2]}
-            tipos.append(tipo)
-        
-        cursor.close()
-        conn.close()
+        tabla = await reference_cache.table("tipo_producto")
+        total, total_modo = in_memory_total(len(tabla.rows), modo_total)
+        tipos, next_cursor = paginate_list(tabla.rows, skip, limit, cursor, key=itemgetter("id"))
         
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(tipos)} tipos de productos",
-            data=tipos,
-            total=total
-        )
+        return list_response(f"Se obtuvieron {len(tipos)} tipos de productos", tipos, total, total_modo, next_cursor)
     
+    except HTTPException:
+        raise
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
     except Exception as e:
@@ -174,21 +226,11 @@ async def get_tipos_productos(skip: int = Query(0, ge=0), limit: int = Query(10,
 async def get_tipo_producto(tipo_id: int):
     """Obtener un tipo de producto específico"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, nombre, unidad_base FROM tipo_producto WHERE id = %s", (tipo_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        tipo = await reference_cache.get("tipo_producto", tipo_id)
         
-        if not row:
+        if not tipo:
             raise HTTPException(status_code=404, detail=f"Tipo de producto con ID {tipo_id} no encontrado")
         
-        tipo = {"id": row[0], "nombre": row[1], "unidad_base": row[2]}
-        
         return GenericResponse(
             success=True,
             message="Tipo de producto obtenido correctamente",
@@ -203,38 +245,17 @@ async def get_tipo_producto(tipo_id: int):
 # ============ ENDPOINTS PAIS ============
 
 @app.get("/paises", response_model=ListResponse)
-async def get_paises(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def get_paises(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener lista de países"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM pais")
-        total = cursor.fetchone()[0]
-        
-        query = "SELECT id, nombre, moneda, moneda_tic, simbolo, side, decs FROM pais LIMIT %s OFFSET %s"
-        cursor.execute(query, (limit, skip))
-        
-        paises = []
-        for row in cursor.fetchall():
-            pais = {
-                "id": row[0], "nombre": row[1], "moneda": row[2], "moneda_tic": row[3],
-                "simbolo": row[4], "side": row[5], "decs": row[6]
-            }
-            paises.append(pais)
-        
-        cursor.close()
-        conn.close()
+        tabla = await reference_cache.table("pais")
+        total, total_modo = in_memory_total(len(tabla.rows), modo_total)
+        paises, next_cursor = paginate_list(tabla.rows, skip, limit, cursor, key=itemgetter("id"), id_type=str)
         
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(paises)} países",
-            data=paises,
-            total=total
-        )
+        return list_response(f"Se obtuvieron {len(paises)} países", paises, total, total_modo, next_cursor)
     
+    except HTTPException:
+        raise
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
     except Exception as e:
@@ -244,24 +265,11 @@ async def get_paises(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le
 async def get_pais(pais_id: str):
     """Obtener un país específico"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, nombre, moneda, moneda_tic, simbolo, side, decs FROM pais WHERE id = %s", (pais_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        pais = await reference_cache.get("pais", pais_id)
         
-        if not row:
+        if not pais:
             raise HTTPException(status_code=404, detail=f"País con ID {pais_id} no encontrado")
         
-        pais = {
-            "id": row[0], "nombre": row[1], "moneda": row[2], "moneda_tic": row[3],
-            "simbolo": row[4], "side": row[5], "decs": row[6]
-        }
-        
         return GenericResponse(
             success=True,
             message="País obtenido correctamente",
@@ -276,50 +284,18 @@ async def get_pais(pais_id: str):
 # ============ ENDPOINTS PRODUCTO ============
 
 @app.get("/productos", response_model=ListResponse)
-async def get_productos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def get_productos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener lista de productos con información detallada"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM producto")
-        total = cursor.fetchone()[0]
-        
-        query = """
-            SELECT 
-                p.id, p.nombre, p.cantidad, p.precio_base,
-                p.id_tipo_producto, p.id_conjunto,
-                tp.nombre, tp.unidad_base,
-                c.nombre
-            FROM producto p
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            LEFT JOIN conjunto c ON p.id_conjunto = c.id
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(query, (limit, skip))
-        
-        productos = []
-        for row in cursor.fetchall():
-            producto = {
-                "id": row[0], "nombre": row[1], "cantidad": row[2], "precio_base": row[3],
-                "id_tipo_producto": row[4], "id_conjunto": row[5],
-                "tipo_producto_nombre": row[6], "tipo_producto_unidad_base": row[7],
-                "conjunto_nombre": row[8]
-            }
-            productos.append(producto)
-        
-        cursor.close()
-        conn.close()
+        query, params = PRODUCTO.page([], [], skip, limit, cursor)
+        total, total_modo, rows = await counts.fetch_page("SELECT COUNT(*) FROM producto", (), prepared("productos", query), params, modo_total, "producto")
+        rows, next_cursor = split_page(rows, limit, cursor, key=PRODUCTO.key)
+        productos = await PRODUCTO.map_rows(rows)
         
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(productos)} productos",
-            data=productos,
-            total=total
-        )
+        return list_response(f"Se obtuvieron {len(productos)} productos", productos, total, total_modo, next_cursor)
     
+    except HTTPException:
+        raise
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
     except Exception as e:
@@ -329,36 +305,10 @@ async def get_productos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1,
 async def get_producto(producto_id: int):
     """Obtener un producto específico"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                p.id, p.nombre, p.cantidad, p.precio_base,
-                p.id_tipo_producto, p.id_conjunto,
-                tp.nombre, tp.unidad_base,
-                c.nombre
-            FROM producto p
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            LEFT JOIN conjunto c ON p.id_conjunto = c.id
-            WHERE p.id = %s
-        """
-        cursor.execute(query, (producto_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Producto con ID {producto_id} no encontrado")
+        producto = await PRODUCTO.map_one(await db.fetch_one(PRODUCTO.by_id, (producto_id,)))
         
-        producto = {
-            "id": row[0], "nombre": row[1], "cantidad": row[2], "precio_base": row[3],
-            "id_tipo_producto": row[4], "id_conjunto": row[5],
-            "tipo_producto_nombre": row[6], "tipo_producto_unidad_base": row[7],
-            "conjunto_nombre": row[8]
-        }
+        if not producto:
+            raise HTTPException(status_code=404, detail=f"Producto con ID {producto_id} no encontrado")
         
         return GenericResponse(
             success=True,
@@ -371,54 +321,42 @@ async def get_producto(producto_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.post("/productos/lote", response_model=GenericResponse)
+async def get_productos_lote(lote: LoteIds):
+    """Obtener varios productos por id en una sola consulta. Responde un mapa id -> producto y los ids no encontrados"""
+    try:
+        ids = list(dict.fromkeys(lote.ids))
+        rows = await db.fetch_all(PRODUCTO.where(f"p.id IN ({_marcadores(ids)})"), ids)
+        productos = {str(producto["id"]): producto for producto in await PRODUCTO.map_rows(rows)}
+        
+        return GenericResponse(
+            success=True,
+            message=f"Se obtuvieron {len(productos)} de {len(ids)} productos",
+            data={"productos": productos, "no_encontrados": [i for i in ids if str(i) not in productos]}
+        )
+    
+    except HTTPException:
+        raise
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
 # ============ ENDPOINTS PERTENENCIA ============
 
 @app.get("/pertenencias", response_model=ListResponse)
-async def get_pertenencias(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def get_pertenencias(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener lista de pertenencias con información detallada"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM pertenencia")
-        total = cursor.fetchone()[0]
-        
-        query = """
-            SELECT 
-                pe.id, pe.id_conjunto, pe.id_producto,
-                c.nombre, c.sitio,
-                p.nombre, p.cantidad,
-                tp.nombre
-            FROM pertenencia pe
-            LEFT JOIN conjunto c ON pe.id_conjunto = c.id
-            LEFT JOIN producto p ON pe.id_producto = p.id
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(query, (limit, skip))
-        
-        pertenencias = []
-        for row in cursor.fetchall():
-            pertenencia = {
-                "id": row[0], "id_conjunto": row[1], "id_producto": row[2],
-                "conjunto_nombre": row[3], "conjunto_sitio": row[4],
-                "producto_nombre": row[5], "producto_cantidad": row[6],
-                "tipo_producto_nombre": row[7]
-            }
-            pertenencias.append(pertenencia)
+        query, params = PERTENENCIA.page([], [], skip, limit, cursor)
+        total, total_modo, rows = await counts.fetch_page("SELECT COUNT(*) FROM pertenencia", (), prepared("pertenencias", query), params, modo_total, "pertenencia")
+        rows, next_cursor = split_page(rows, limit, cursor, key=PERTENENCIA.key)
+        pertenencias = await PERTENENCIA.map_rows(rows)
         
-        cursor.close()
-        conn.close()
-        
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(pertenencias)} pertenencias",
-            data=pertenencias,
-            total=total
-        )
+        return list_response(f"Se obtuvieron {len(pertenencias)} pertenencias", pertenencias, total, total_modo, next_cursor)
     
+    except HTTPException:
+        raise
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
     except Exception as e:
@@ -428,37 +366,10 @@ async def get_pertenencias(skip: int = Query(0, ge=0), limit: int = Query(10, ge
 async def get_pertenencia(pertenencia_id: int):
     """Obtener una pertenencia específica"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                pe.id, pe.id_conjunto, pe.id_producto,
-                c.nombre, c.sitio,
-                p.nombre, p.cantidad,
-                tp.nombre
-            FROM pertenencia pe
-            LEFT JOIN conjunto c ON pe.id_conjunto = c.id
-            LEFT JOIN producto p ON pe.id_producto = p.id
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            WHERE pe.id = %s
-        """
-        cursor.execute(query, (pertenencia_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Pertenencia con ID {pertenencia_id} no encontrada")
+        pertenencia = await PERTENENCIA.map_one(await db.fetch_one(PERTENENCIA.by_id, (pertenencia_id,)))
         
-        pertenencia = {
-            "id": row[0], "id_conjunto": row[1], "id_producto": row[2],
-            "conjunto_nombre": row[3], "conjunto_sitio": row[4],
-            "producto_nombre": row[5], "producto_cantidad": row[6],
-            "tipo_producto_nombre": row[7]
-        }
+        if not pertenencia:
+            raise HTTPException(status_code=404, detail=f"Pertenencia con ID {pertenencia_id} no encontrada")
         
         return GenericResponse(
             success=True,
@@ -472,52 +383,21 @@ async def get_pertenencia(pertenencia_id: int):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.get("/pertenencias/conjunto/{conjunto_id}", response_model=ListResponse)
-async def get_pertenencias_by_conjunto(conjunto_id: int, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def get_pertenencias_by_conjunto(conjunto_id: int, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener todas las pertenencias de un conjunto"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM pertenencia WHERE id_conjunto = %s", (conjunto_id,))
-        total = cursor.fetchone()[0]
-        
-        query = """
-            SELECT 
-                pe.id, pe.id_conjunto, pe.id_producto,
-                c.nombre, c.sitio,
-                p.nombre, p.cantidad,
-                tp.nombre
-            FROM pertenencia pe
-            LEFT JOIN conjunto c ON pe.id_conjunto = c.id
-            LEFT JOIN producto p ON pe.id_producto = p.id
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            WHERE pe.id_conjunto = %s
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(query, (conjunto_id, limit, skip))
-        
-        pertenencias = []
-        for row in cursor.fetchall():
-            pertenencia = {
-                "id": row[0], "id_conjunto": row[1], "id_producto": row[2],
-                "conjunto_nombre": row[3], "conjunto_sitio": row[4],
-                "producto_nombre": row[5], "producto_cantidad": row[6],
-                "tipo_producto_nombre": row[7]
-            }
-            pertenencias.append(pertenencia)
-        
-        cursor.close()
-        conn.close()
-        
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(pertenencias)} pertenencias del conjunto",
-            data=pertenencias,
-            total=total
+        query, params = PERTENENCIA.page([conjunto_id], ["pe.id_conjunto = %s"], skip, limit, cursor)
+        total, total_modo, rows = await counts.fetch_page(
+            "SELECT COUNT(*) FROM pertenencia WHERE id_conjunto = %s", (conjunto_id,),
+            prepared("pertenencias_conjunto", query), params, modo_total
         )
+        rows, next_cursor = split_page(rows, limit, cursor, key=PERTENENCIA.key)
+        pertenencias = await PERTENENCIA.map_rows(rows)
+        
+        return list_response(f"Se obtuvieron {len(pertenencias)} pertenencias del conjunto", pertenencias, total, total_modo, next_cursor)
     
+    except HTTPException:
+        raise
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
     except Exception as e:
@@ -526,47 +406,18 @@ async def get_pertenencias_by_conjunto(conjunto_id: int, skip: int = Query(0, ge
 # ============ ENDPOINTS TEXTOS ============
 
 @app.get("/textos", response_model=ListResponse)
-async def get_textos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100)):
+async def get_textos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener lista de textos localizados"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM textos")
-        total = cursor.fetchone()[0]
-        
-        query = """
-            SELECT 
-                t.id, t.id_tipo_producto, t.id_pais, t.unidad, t.unidades,
-                tp.nombre, p.nombre
-            FROM textos t
-            LEFT JOIN tipo_producto tp ON t.id_tipo_producto = tp.id
-            LEFT JOIN pais p ON t.id_pais = p.id
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(query, (limit, skip))
-        
-        textos = []
-        for row in cursor.fetchall():
-            texto = {
-                "id": row[0], "id_tipo_producto": row[1], "id_pais": row[2],
-                "unidad": row[3], "unidades": row[4],
-                "tipo_producto_nombre": row[5], "pais_nombre": row[6]
-            }
-            textos.append(texto)
-        
-        cursor.close()
-        conn.close()
+        query, params = TEXTOS.page([], [], skip, limit, cursor)
+        total, total_modo, rows = await counts.fetch_page("SELECT COUNT(*) FROM textos", (), prepared("textos", query), params, modo_total, "textos")
+        rows, next_cursor = split_page(rows, limit, cursor, key=TEXTOS.key)
+        textos = await TEXTOS.map_rows(rows)
         
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(textos)} textos",
-            data=textos,
-            total=total
-        )
+        return list_response(f"Se obtuvieron {len(textos)} textos", textos, total, total_modo, next_cursor)
     
+    except HTTPException:
+        raise
     except Error as e:
         raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
     except Exception as e:
@@ -576,33 +427,10 @@ async def get_textos(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le
 async def get_texto(texto_id: int):
     """Obtener un texto específico"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                t.id, t.id_tipo_producto, t.id_pais, t.unidad, t.unidades,
-                tp.nombre, p.nombre
-            FROM textos t
-            LEFT JOIN tipo_producto tp ON t.id_tipo_producto = tp.id
-            LEFT JOIN pais p ON t.id_pais = p.id
-            WHERE t.id = %s
-        """
-        cursor.execute(query, (texto_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Texto con ID {texto_id} no encontrado")
+        texto = await TEXTOS.map_one(await db.fetch_one(TEXTOS.by_id, (texto_id,)))
         
-        texto = {
-            "id": row[0], "id_tipo_producto": row[1], "id_pais": row[2],
-            "unidad": row[3], "unidades": row[4],
-            "tipo_producto_nombre": row[5], "pais_nombre": row[6]
-        }
+        if not texto:
+            raise HTTPException(status_code=404, detail=f"Texto con ID {texto_id} no encontrado")
         
         return GenericResponse(
             success=True,
@@ -619,33 +447,10 @@ async def get_texto(texto_id: int):
 async def get_texto_by_tipo_pais(tipo_id: int, pais_id: str):
     """Obtener textos para un tipo de producto y país específicos"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                t.id, t.id_tipo_producto, t.id_pais, t.unidad, t.unidades,
-                tp.nombre, p.nombre
-            FROM textos t
-            LEFT JOIN tipo_producto tp ON t.id_tipo_producto = tp.id
-            LEFT JOIN pais p ON t.id_pais = p.id
-            WHERE t.id_tipo_producto = %s AND t.id_pais = %s
-        """
-        cursor.execute(query, (tipo_id, pais_id))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Texto para tipo {tipo_id} y país {pais_id} no encontrado")
+        texto = await TEXTOS.map_one(await db.fetch_one(TEXTO_POR_TIPO_PAIS, (tipo_id, pais_id)))
         
-        texto = {
-            "id": row[0], "id_tipo_producto": row[1], "id_pais": row[2],
-            "unidad": row[3], "unidades": row[4],
-            "tipo_producto_nombre": row[5], "pais_nombre": row[6]
-        }
+        if not texto:
+            raise HTTPException(status_code=404, detail=f"Texto para tipo {tipo_id} y país {pais_id} no encontrado")
         
         return GenericResponse(
             success=True,
@@ -658,100 +463,95 @@ async def get_texto_by_tipo_pais(tipo_id: int, pais_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.post("/textos/lote", response_model=GenericResponse)
+async def get_textos_lote(lote: LoteTextos):
+    """Obtener los textos de varios pares tipo de producto/país en una sola consulta. Responde un mapa "tipo:pais" -> texto"""
+    try:
+        pares = list(dict.fromkeys((par.id_tipo_producto, par.id_pais) for par in lote.pares))
+        query = TEXTOS.where(f"(t.id_tipo_producto, t.id_pais) IN ({', '.join(['(%s, %s)'] * len(pares))})")
+        rows = await db.fetch_all(query, [valor for par in pares for valor in par])
+        
+        # El id de país no distingue mayúsculas (collation *_ci); se responde con la llave pedida
+        por_par = {(texto["id_tipo_producto"], str(texto["id_pais"]).upper()): texto for texto in await TEXTOS.map_rows(rows)}
+        textos = {}
+        no_encontrados = []
+        for tipo_id, pais_id in pares:
+            texto = por_par.get((tipo_id, pais_id.upper()))
+            if not texto:
+                no_encontrados.append({"id_tipo_producto": tipo_id, "id_pais": pais_id})
+                continue
+            textos[f"{tipo_id}:{pais_id}"] = texto
+        
+        return GenericResponse(
+            success=True,
+            message=f"Se obtuvieron {len(textos)} de {len(pares)} textos",
+            data={"textos": textos, "no_encontrados": no_encontrados}
+        )
+    
+    except HTTPException:
+        raise
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
 # ============ ENDPOINTS PRECIO ============
 
+# Campos del detalle por fila de los listados de precios (solo en requests muestreados, ver app_logging)
+PRECIO_LOG_FIELDS = ("id", "nombre", "price_id", "cantidad_precio", "id_pais", "conjunto_nombre", "producto_nombre", "ambiente")
+
+async def _listar_precios(skip, limit, cursor, modo_total, id_pertenencia=None, id_pais=None, ambiente=None):
+    """
+    Total, modo del total, página y next_cursor de precios filtrados; desde el
+    catálogo en memoria o, si está desactivado, con SQL
+    """
+    snapshot = await precio_catalog.current()
+    if snapshot is not None:
+        seleccion = snapshot.filter(id_pertenencia=id_pertenencia, id_pais=id_pais, ambiente=ambiente)
+        precios, next_cursor = paginate_list(seleccion, skip, limit, cursor, key=attrgetter("id"))
+        total, total_modo = in_memory_total(len(seleccion), modo_total)
+        return total, total_modo, precios, next_cursor
+    
+    condiciones = []
+    params = []
+    if id_pertenencia is not None:
+        condiciones.append("pr.id_pertenencia = %s")
+        params.append(id_pertenencia)
+    if ambiente:
+        condiciones.append("pr.ambiente = %s")
+        params.append(ambiente)
+    if id_pais:
+        condiciones.append("pr.id_pais = %s")
+        params.append(id_pais)
+    where = " WHERE " + " AND ".join(condiciones) if condiciones else ""
+    
+    count_query = "SELECT COUNT(*) FROM precio pr" + where
+    query, query_params = PRECIO.page(params, condiciones, skip, limit, cursor)
+    total, total_modo, rows = await counts.fetch_page(count_query, params, prepared("precios", query), query_params, modo_total, "precio")
+    rows, next_cursor = split_page(rows, limit, cursor, key=PRECIO.key)
+    return total, total_modo, await PRECIO.map_rows(rows), next_cursor
+
 @app.get("/precios", response_model=ListResponse)
-async def get_precios(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), ambiente: str = Query(None), pais: str = Query(None)):
+async def get_precios(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), ambiente: str = Query(None), pais: str = Query(None), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener lista de precios. Filtrar por ambiente (sandbox/production) y/o pais (ISO 2 letras: MX, CL, etc)"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        
         # Convertir ISO alpha-2 (MX) a moneda (MXN)
         pais_moneda = None
         if pais:
             pais_upper = pais.upper()
-            logger.debug(f"Buscando pais con iso_alpha2={pais_upper}")
+            logger.debug("Buscando pais con iso_alpha2=%s", pais_upper)
             # Buscar la moneda usando iso_alpha2
-            cursor.execute("SELECT id FROM pais WHERE iso_alpha2 = %s", (pais_upper,))
-            row = cursor.fetchone()
-            if not row:
-                cursor.close()
-                conn.close()
+            pais_moneda = await reference_cache.resolve_pais_iso(pais_upper)
+            if not pais_moneda:
                 raise HTTPException(status_code=404, detail=f"País {pais_upper} no encontrado")
-            pais_moneda = row[0]
-            logger.debug(f"Resultado: pais_moneda={pais_moneda}")
-        
-        # Build count query
-        count_query = "SELECT COUNT(*) FROM precio WHERE 1=1"
-        count_params = []
-        
-        if ambiente:
-            count_query += " AND ambiente = %s"
-            count_params.append(ambiente)
-        if pais_moneda:
-            count_query += " AND id_pais = %s"
-            count_params.append(pais_moneda)
-        
-        cursor.execute(count_query, count_params)
-        total = cursor.fetchone()[0]
-        
-        # Build main query
-        query = """
-            SELECT 
-                pr.id, pr.nombre, pr.id_pertenencia, pr.id_pais, pr.price_id,
-                pr.cantidad_precio, pr.ratio_imagen, pr.status, pr.ambiente,
-                pe.id, p.nombre, p.cantidad,
-                tp.nombre,
-                c.nombre,
-                pa.nombre, pa.moneda, pa.simbolo, pa.side, pa.decs
-            FROM precio pr
-            LEFT JOIN pertenencia pe ON pr.id_pertenencia = pe.id
-            LEFT JOIN producto p ON pe.id_producto = p.id
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            LEFT JOIN conjunto c ON pe.id_conjunto = c.id
-            LEFT JOIN pais pa ON pr.id_pais = pa.id
-            WHERE 1=1
-        """
-        query_params = []
-        
-        if ambiente:
-            query += " AND pr.ambiente = %s"
-            query_params.append(ambiente)
-        if pais_moneda:
-            query += " AND pr.id_pais = %s"
-            query_params.append(pais_moneda)
-        
-        query += " LIMIT %s OFFSET %s"
-        query_params.extend([limit, skip])
-        
-        cursor.execute(query, query_params)
-        
-        precios = []
-        for row in cursor.fetchall():
-            precio = {
-                "id": row[0], "nombre": row[1], "id_pertenencia": row[2], "id_pais": row[3],
-                "price_id": row[4], "cantidad_precio": row[5], "ratio_imagen": row[6], "status": row[7], "ambiente": row[8],
-                "pertenencia_id": row[9], "producto_nombre": row[10], "producto_cantidad": row[11],
-                "tipo_producto_nombre": row[12], "conjunto_nombre": row[13],
-                "pais_nombre": row[14], "pais_moneda": row[15], "pais_simbolo": row[16],
-                "pais_side": row[17], "pais_decs": row[18]
-            }
-            logger.debug(f"Precio /precios - precio_id={precio['id']}, nombre={precio['nombre']}, price_id={precio['price_id']}, cantidad_precio={precio['cantidad_precio']}, ratio_imagen={precio['ratio_imagen']}, id_pais={precio['id_pais']}, pais={precio['pais_nombre']}, conjunto={precio['conjunto_nombre']}, producto={precio['producto_nombre']}, ambiente={precio['ambiente']}")
-            precios.append(precio)
+            logger.debug("Resultado: pais_moneda=%s", pais_moneda)
         
-        cursor.close()
-        conn.close()
+        total, total_modo, precios, next_cursor = await _listar_precios(skip, limit, cursor, modo_total, id_pais=pais_moneda, ambiente=ambiente)
         
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(precios)} precios",
-            data=precios,
-            total=total
-        )
+        annotate(filas=len(precios), total=total, pais=pais_moneda, ambiente=ambiente)
+        log_rows(logger, "Precio /precios", precios, PRECIO_LOG_FIELDS)
+        
+        return list_response(f"Se obtuvieron {len(precios)} precios", precios, total, total_modo, next_cursor)
     
     except HTTPException:
         raise
@@ -764,43 +564,14 @@ async def get_precios(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, l
 async def get_precio(precio_id: int):
     """Obtener un precio específico"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                pr.id, pr.nombre, pr.id_pertenencia, pr.id_pais, pr.price_id,
-                pr.cantidad_precio, pr.ratio_imagen, pr.status, pr.ambiente,
-                pe.id, p.nombre, p.cantidad,
-                tp.nombre,
-                c.nombre,
-                pa.nombre, pa.moneda, pa.simbolo, pa.side, pa.decs
-            FROM precio pr
-            LEFT JOIN pertenencia pe ON pr.id_pertenencia = pe.id
-            LEFT JOIN producto p ON pe.id_producto = p.id
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            LEFT JOIN conjunto c ON pe.id_conjunto = c.id
-            LEFT JOIN pais pa ON pr.id_pais = pa.id
-            WHERE pr.id = %s
-        """
-        cursor.execute(query, (precio_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        if not row:
-            raise HTTPException(status_code=404, detail=f"Precio con ID {precio_id} no encontrado")
+        snapshot = await precio_catalog.current()
+        if snapshot is not None:
+            precio = as_dict(snapshot.get(precio_id))
+        else:
+            precio = await PRECIO.map_one(await db.fetch_one(PRECIO_POR_ID, (precio_id,)))
         
-        precio = {
-            "id": row[0], "nombre": row[1], "id_pertenencia": row[2], "id_pais": row[3],
-            "price_id": row[4], "cantidad_precio": row[5], "ratio_imagen": row[6], "status": row[7], "ambiente": row[8],
-            "pertenencia_id": row[9], "producto_nombre": row[10], "producto_cantidad": row[11],
-            "tipo_producto_nombre": row[12], "conjunto_nombre": row[13],
-            "pais_nombre": row[14], "pais_moneda": row[15], "pais_simbolo": row[16],
-            "pais_side": row[17], "pais_decs": row[18]
-        }
+        if not precio:
+            raise HTTPException(status_code=404, detail=f"Precio con ID {precio_id} no encontrado")
         
         return GenericResponse(
             success=True,
@@ -814,94 +585,25 @@ async def get_precio(precio_id: int):
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 @app.get("/precios/pertenencia/{pertenencia_id}", response_model=ListResponse)
-async def get_precios_by_pertenencia(pertenencia_id: int, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), ambiente: str = Query(None), pais: str = Query(None)):
+async def get_precios_by_pertenencia(pertenencia_id: int, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), ambiente: str = Query(None), pais: str = Query(None), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener precios de una pertenencia. Filtrar por ambiente y/o pais (ISO 3 o 2 letras)"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        
         # Convertir ISO alpha-2 (MX) a moneda (MXN)
         pais_moneda = None
         if pais:
             pais_upper = pais.upper()
-            logger.debug(f"Buscando pais con iso_alpha2={pais_upper}")
-            cursor.execute("SELECT id FROM pais WHERE iso_alpha2 = %s", (pais_upper,))
-            row = cursor.fetchone()
-            if not row:
-                cursor.close()
-                conn.close()
+            logger.debug("Buscando pais con iso_alpha2=%s", pais_upper)
+            pais_moneda = await reference_cache.resolve_pais_iso(pais_upper)
+            if not pais_moneda:
                 raise HTTPException(status_code=404, detail=f"País {pais_upper} no encontrado")
-            pais_moneda = row[0]
-            logger.debug(f"Resultado: pais_moneda={pais_moneda}")
-        
-        count_query = "SELECT COUNT(*) FROM precio WHERE id_pertenencia = %s"
-        count_params = [pertenencia_id]
-        
-        if ambiente:
-            count_query += " AND ambiente = %s"
-            count_params.append(ambiente)
-        if pais_moneda:
-            count_query += " AND id_pais = %s"
-            count_params.append(pais_moneda)
-        
-        cursor.execute(count_query, count_params)
-        total = cursor.fetchone()[0]
-        
-        query = """
-            SELECT 
-                pr.id, pr.nombre, pr.id_pertenencia, pr.id_pais, pr.price_id,
-                pr.cantidad_precio, pr.ratio_imagen, pr.status, pr.ambiente,
-                pe.id, p.nombre, p.cantidad,
-                tp.nombre,
-                c.nombre,
-                pa.nombre, pa.moneda, pa.simbolo, pa.side, pa.decs
-            FROM precio pr
-            LEFT JOIN pertenencia pe ON pr.id_pertenencia = pe.id
-            LEFT JOIN producto p ON pe.id_producto = p.id
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            LEFT JOIN conjunto c ON pe.id_conjunto = c.id
-            LEFT JOIN pais pa ON pr.id_pais = pa.id
-            WHERE pr.id_pertenencia = %s
-        """
-        query_params = [pertenencia_id]
-        
-        if ambiente:
-            query += " AND pr.ambiente = %s"
-            query_params.append(ambiente)
-        if pais_moneda:
-            query += " AND pr.id_pais = %s"
-            query_params.append(pais_moneda)
-        
-        query += " LIMIT %s OFFSET %s"
-        query_params.extend([limit, skip])
-        
-        cursor.execute(query, query_params)
-        
-        precios = []
-        for row in cursor.fetchall():
-            precio = {
-                "id": row[0], "nombre": row[1], "id_pertenencia": row[2], "id_pais": row[3],
-                "price_id": row[4], "cantidad_precio": row[5], "ratio_imagen": row[6], "status": row[7], "ambiente": row[8],
-                "pertenencia_id": row[9], "producto_nombre": row[10], "producto_cantidad": row[11],
-                "tipo_producto_nombre": row[12], "conjunto_nombre": row[13],
-                "pais_nombre": row[14], "pais_moneda": row[15], "pais_simbolo": row[16],
-                "pais_side": row[17], "pais_decs": row[18]
-            }
-            logger.debug(f"Precio /pertenencia - id={precio['id']}, id_pais={precio['id_pais']}, conjunto={precio['conjunto_nombre']}, producto={precio['producto_nombre']}, ambiente={precio['ambiente']}")
-            precios.append(precio)
+            logger.debug("Resultado: pais_moneda=%s", pais_moneda)
         
-        cursor.close()
-        conn.close()
+        total, total_modo, precios, next_cursor = await _listar_precios(skip, limit, cursor, modo_total, id_pertenencia=pertenencia_id, id_pais=pais_moneda, ambiente=ambiente)
         
-        return ListResponse(
-            success=True,
-            message=f"Se obtuvieron {len(precios)} precios para la pertenencia",
-            data=precios,
-            total=total
-        )
+        annotate(filas=len(precios), total=total, pertenencia=pertenencia_id, pais=pais_moneda, ambiente=ambiente)
+        log_rows(logger, "Precio /pertenencia", precios, PRECIO_LOG_FIELDS)
+        
+        return list_response(f"Se obtuvieron {len(precios)} precios para la pertenencia", precios, total, total_modo, next_cursor)
     
     except HTTPException:
         raise
@@ -911,85 +613,91 @@ async def get_precios_by_pertenencia(pertenencia_id: int, skip: int = Query(0, g
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
 @app.get("/precios/pais/{pais_id}", response_model=ListResponse)
-async def get_precios_by_pais(pais_id: str, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), ambiente: str = Query(None)):
+async def get_precios_by_pais(pais_id: str, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), ambiente: str = Query(None), cursor: str = Query(None, description="Cursor opaco para paginar por llave (vacío = primera página)"), modo_total: str = Query("exacto", alias="total", pattern=TOTAL_MODE_PATTERN, description="exacto, estimado o ninguno")):
     """Obtener precios de un país. Acepta ISO 3 letras o 2 letras. Filtrar por ambiente opcional"""
     try:
-        conn = get_connection()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Error de conexión a la base de datos")
-        
-        cursor = conn.cursor()
-        
         # Convertir ISO alpha-2 (MX) a moneda (MXN)
         pais_id_upper = pais_id.upper()
-        logger.debug(f"Buscando pais con iso_alpha2={pais_id_upper}")
-        cursor.execute("SELECT id FROM pais WHERE iso_alpha2 = %s", (pais_id_upper,))
-        result = cursor.fetchone()
-        if not result:
-            cursor.close()
-            conn.close()
+        logger.debug("Buscando pais con iso_alpha2=%s", pais_id_upper)
+        pais_filter = await reference_cache.resolve_pais_iso(pais_id_upper)
+        if not pais_filter:
             raise HTTPException(status_code=404, detail=f"País {pais_id_upper} no encontrado")
-        pais_filter = result[0]
-        logger.debug(f"Resultado: pais_filter={pais_filter}")
-        
-        count_query = "SELECT COUNT(*) FROM precio WHERE id_pais = %s"
-        count_params = [pais_filter]
-        
-        if ambiente:
-            count_query += " AND ambiente = %s"
-            count_params.append(ambiente)
-        
-        cursor.execute(count_query, count_params)
-        total = cursor.fetchone()[0]
-        
-        query = """
-            SELECT 
-                pr.id, pr.nombre, pr.id_pertenencia, pr.id_pais, pr.price_id,
-                pr.cantidad_precio, pr.ratio_imagen, pr.status, pr.ambiente,
-                pe.id, p.nombre, p.cantidad,
-                tp.nombre,
-                c.nombre,
-                pa.nombre, pa.moneda, pa.simbolo, pa.side, pa.decs
-            FROM precio pr
-            LEFT JOIN pertenencia pe ON pr.id_pertenencia = pe.id
-            LEFT JOIN producto p ON pe.id_producto = p.id
-            LEFT JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-            LEFT JOIN conjunto c ON pe.id_conjunto = c.id
-            LEFT JOIN pais pa ON pr.id_pais = pa.id
-            WHERE pr.id_pais = %s
-        """
-        query_params = [pais_filter]
-        
-        if ambiente:
-            query += " AND pr.ambiente = %s"
-            query_params.append(ambiente)
-        
-        query += " LIMIT %s OFFSET %s"
-        query_params.extend([limit, skip])
-        
-        cursor.execute(query, query_params)
-        
-        precios = []
-        for row in cursor.fetchall():
-            precio = {
-                "id": row[0], "nombre": row[1], "id_pertenencia": row[2], "id_pais": row[3],
-                "price_id": row[4], "cantidad_precio": row[5], "ratio_imagen": row[6], "status": row[7], "ambiente": row[8],
-                "pertenencia_id": row[9], "producto_nombre": row[10], "producto_cantidad": row[11],
-                "tipo_producto_nombre": row[12], "conjunto_nombre": row[13],
-                "pais_nombre": row[14], "pais_moneda": row[15], "pais_simbolo": row[16],
-                "pais_side": row[17], "pais_decs": row[18]
-            }
-            logger.debug(f"Precio /pais - id={precio['id']}, id_pais={precio['id_pais']}, conjunto={precio['conjunto_nombre']}, producto={precio['producto_nombre']}, ambiente={precio['ambiente']}")
-            precios.append(precio)
+        logger.debug("Resultado: pais_filter=%s", pais_filter)
+        
+        total, total_modo, precios, next_cursor = await _listar_precios(skip, limit, cursor, modo_total, id_pais=pais_filter, ambiente=ambiente)
+        
+        annotate(filas=len(precios), total=total, pais=pais_filter, ambiente=ambiente)
+        log_rows(logger, "Precio /pais", precios, PRECIO_LOG_FIELDS)
+        
+        return list_response(f"Se obtuvieron {len(precios)} precios para el país", precios, total, total_modo, next_cursor)
+    
+    except HTTPException:
+        raise
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+@app.post("/precios/lote", response_model=GenericResponse)
+async def get_precios_lote(lote: LoteIds):
+    """Obtener varios precios por id de una vez. Responde un mapa id -> precio y los ids no encontrados"""
+    try:
+        ids = list(dict.fromkeys(lote.ids))
+        snapshot = await precio_catalog.current()
+        if snapshot is not None:
+            encontrados = [snapshot.get(precio_id) for precio_id in ids]
+        else:
+            encontrados = await PRECIO.map_rows(await db.fetch_all(PRECIO.where(f"pr.id IN ({_marcadores(ids)})"), ids))
+        precios = {str(precio["id"]): as_dict(precio) for precio in encontrados if precio}
         
-        cursor.close()
-        conn.close()
+        return GenericResponse(
+            success=True,
+            message=f"Se obtuvieron {len(precios)} de {len(ids)} precios",
+            data={"precios": precios, "no_encontrados": [i for i in ids if str(i) not in precios]}
+        )
+    
+    except HTTPException:
+        raise
+    except Error as e:
+        raise HTTPException(status_code=500, detail=f"Error de base de datos: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
+
+@app.post("/precios/pertenencias/lote", response_model=GenericResponse)
+async def get_precios_pertenencias_lote(lote: LotePreciosPertenencia):
+    """Obtener los precios de varias pertenencias de una vez. Filtrar por ambiente y/o pais (ISO 3 o 2 letras). Responde un mapa id_pertenencia -> precios"""
+    try:
+        ids = list(dict.fromkeys(lote.ids))
+        pais_moneda = None
+        if lote.pais:
+            pais_moneda = await reference_cache.resolve_pais_iso(lote.pais.upper())
+            if not pais_moneda:
+                raise HTTPException(status_code=404, detail=f"País {lote.pais.upper()} no encontrado")
+        
+        snapshot = await precio_catalog.current()
+        if snapshot is not None:
+            precios = {
+                str(pertenencia_id): [as_dict(precio) for precio in snapshot.filter(id_pertenencia=pertenencia_id, id_pais=pais_moneda, ambiente=lote.ambiente)]
+                for pertenencia_id in ids
+            }
+        else:
+            condiciones = [f"pr.id_pertenencia IN ({_marcadores(ids)})"]
+            params = list(ids)
+            if lote.ambiente:
+                condiciones.append("pr.ambiente = %s")
+                params.append(lote.ambiente)
+            if pais_moneda:
+                condiciones.append("pr.id_pais = %s")
+                params.append(pais_moneda)
+            rows = await db.fetch_all(PRECIO.where(*condiciones) + " ORDER BY pr.id", params)
+            precios = {str(pertenencia_id): [] for pertenencia_id in ids}
+            for precio in await PRECIO.map_rows(rows):
+                precios[str(precio["id_pertenencia"])].append(precio)
         
-        return ListResponse(
+        return GenericResponse(
             success=True,
-            message=f"Se obtuvieron {len(precios)} precios para el país",
-            data=precios,
-            total=total
+            message=f"Se obtuvieron {sum(len(lista) for lista in precios.values())} precios para {len(ids)} pertenencias",
+            data={"precios": precios}
         )
     
     except HTTPException:
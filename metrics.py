@@ -0,0 +1,208 @@
+"""
+Métricas por ruta en formato Prometheus (GET /metrics).
+
+Por cada ruta (la plantilla, p. ej. /precios/pais/{pais_id}) y método se registra:
+- histograma de latencia del request,
+- requests por status,
+- sentencias SQL, tiempo en la base de datos y filas devueltas,
+- tiempo esperando una conexión (pool o apertura),
+- tiempo de serialización de la respuesta.
+
+metrics_middleware abre un RequestTimings por request; la capa de datos
+(db.py) y FastJSONResponse le suman sus tiempos a través de current(). Las
+consultas corren en el executor de db.py con el contexto del request copiado,
+así que current() también funciona en esos hilos.
+
+Además se exportan el estado del pool y las aperturas de conexión.
+METRICS_ENABLED=0 desactiva la medición (y /metrics responde vacío).
+"""
+
+import contextvars
+import os
+import threading
+import time
+
+from starlette.routing import Match
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Límites (segundos) del histograma de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RequestTimings:
+    """Tiempos acumulados de un request (se suman desde varios hilos)"""
+    __slots__ = ("sql_statements", "db_seconds", "rows", "acquire_seconds", "serialize_seconds", "_lock")
+
+    def __init__(self):
+        self.sql_statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.acquire_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, seconds, rows):
+        with self._lock:
+            self.sql_statements += 1
+            self.db_seconds += seconds
+            self.rows += rows
+
+    def add_acquire(self, seconds):
+        with self._lock:
+            self.acquire_seconds += seconds
+
+    def add_serialize(self, seconds):
+        with self._lock:
+            self.serialize_seconds += seconds
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+def current():
+    """RequestTimings del request en curso, o None fuera de un request"""
+    return _current.get()
+
+def untrack():
+    """Deja de atribuir al request el trabajo de este contexto (tareas en segundo plano)"""
+    _current.set(None)
+
+class RouteMetrics:
+    """Acumulados de una ruta"""
+    __slots__ = ("buckets", "latency_sum", "count", "status", "sql_statements", "db_seconds",
+                 "rows", "acquire_seconds", "serialize_seconds")
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum = 0.0
+        self.count = 0
+        self.status = {}
+        self.sql_statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.acquire_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+class MetricsRegistry:
+    """Métricas de todas las rutas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, method, route, status, seconds, timings):
+        with self._lock:
+            m = self._routes.get((method, route))
+            if m is None:
+                m = self._routes[(method, route)] = RouteMetrics()
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    m.buckets[i] += 1
+            m.latency_sum += seconds
+            m.count += 1
+            m.status[status] = m.status.get(status, 0) + 1
+            m.sql_statements += timings.sql_statements
+            m.db_seconds += timings.db_seconds
+            m.rows += timings.rows
+            m.acquire_seconds += timings.acquire_seconds
+            m.serialize_seconds += timings.serialize_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {key: _copy(m) for key, m in self._routes.items()}
+
+def _copy(m):
+    copy = RouteMetrics()
+    for name in RouteMetrics.__slots__:
+        value = getattr(m, name)
+        setattr(copy, name, list(value) if isinstance(value, list) else dict(value) if isinstance(value, dict) else value)
+    return copy
+
+registry = MetricsRegistry()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+def _number(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+def render(pool_stats=None, connect_stats=None):
+    """Texto de exposición de Prometheus (versión 0.0.4)"""
+    routes = registry.snapshot()
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_labels(**labels)} {_number(value)}")
+
+    latency = []
+    for (method, route), m in sorted(routes.items()):
+        for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+            latency.append(("_bucket", {"method": method, "route": route, "le": repr(bound)}, count))
+        latency.append(("_bucket", {"method": method, "route": route, "le": "+Inf"}, m.count))
+        latency.append(("_sum", {"method": method, "route": route}, m.latency_sum))
+        latency.append(("_count", {"method": method, "route": route}, m.count))
+    family("api_request_duration_seconds", "histogram", "Latencia de los requests por ruta", latency)
+
+    family("api_requests_total", "counter", "Requests por ruta y status", [
+        ("", {"method": method, "route": route, "status": status}, count)
+        for (method, route), m in sorted(routes.items()) for status, count in sorted(m.status.items())
+    ])
+    for name, attr, help_text in (
+        ("api_sql_statements_total", "sql_statements", "Sentencias SQL ejecutadas"),
+        ("api_db_seconds_total", "db_seconds", "Tiempo en la base de datos (ejecución y lectura de filas)"),
+        ("api_db_rows_total", "rows", "Filas devueltas por la base de datos"),
+        ("api_db_acquire_seconds_total", "acquire_seconds", "Tiempo esperando una conexión"),
+        ("api_serialize_seconds_total", "serialize_seconds", "Tiempo serializando respuestas"),
+    ):
+        family(name, "counter", help_text, [
+            ("", {"method": method, "route": route}, getattr(m, attr)) for (method, route), m in sorted(routes.items())
+        ])
+
+    if pool_stats:
+        for key in ("size", "open", "idle", "in_use"):
+            family(f"db_pool_{key}", "gauge", f"Pool de conexiones: {key}", [("", {}, pool_stats[key])])
+        for key in ("checkouts", "waits", "timeouts", "connections_created", "connections_recycled", "connections_invalid"):
+            family(f"db_pool_{key}_total", "counter", f"Pool de conexiones: {key}", [("", {}, pool_stats[key])])
+        family("db_pool_wait_seconds_total", "counter", "Espera total por una conexión del pool",
+               [("", {}, pool_stats["wait_time_total_ms"] / 1000)])
+    if connect_stats:
+        family("db_connect_attempts_total", "counter", "Aperturas de conexión", [("", {}, connect_stats["attempts"])])
+        family("db_connect_failures_total", "counter", "Aperturas de conexión fallidas", [("", {}, connect_stats["failures"])])
+        family("db_connect_seconds_total", "counter", "Tiempo abriendo conexiones",
+               [("", {}, connect_stats["setup_time_total_ms"] / 1000)])
+    return "\n".join(lines) + "\n"
+
+def _route_path(request):
+    """Plantilla de la ruta del request; si no llegó al router (p. ej. un 304 del ETag) se busca"""
+    route = request.scope.get("route")
+    if route is None:
+        for candidate in request.app.router.routes:
+            match, _ = candidate.matches(request.scope)
+            if match == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", "(sin ruta)")
+
+async def metrics_middleware(request, call_next):
+    """Mide cada request y lo registra bajo la plantilla de su ruta"""
+    if not METRICS_ENABLED:
+        return await call_next(request)
+
+    timings = RequestTimings()
+    token = _current.set(timings)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _current.reset(token)
+        registry.observe(request.method, _route_path(request), status, elapsed, timings)
@@ -0,0 +1,257 @@
+"""
+Migraciones versionadas del esquema (reemplaza los alter_*.py sueltos).
+
+Cada archivo migrations/NNN_nombre.sql es una migración; se aplican en orden
+de versión y cada una queda registrada en la tabla schema_version con el
+checksum (sha256) del archivo. Si un archivo ya aplicado cambia, el runner
+se detiene en lugar de aplicar encima de un esquema distinto.
+
+Modo online (--online): cada ALTER TABLE / CREATE INDEX se ejecuta con
+ALGORITHM=INPLACE, LOCK=NONE. Si MariaDB no puede hacerlo sin copiar la tabla
+rechaza la sentencia (no la ejecuta con bloqueo), el runner lo reporta y se
+detiene; --allow-locking la reintenta sin esas cláusulas (ventana de mantenimiento).
+
+Los DDL de MariaDB no son transaccionales: si una migración falla a la mitad
+no se registra y hay que revisar a mano las sentencias que sí se aplicaron.
+
+Uso:
+    python migrate.py status [--online]          # aplicadas, pendientes y bloqueo previsto
+    python migrate.py migrate [--online] [--allow-locking] [--dry-run] [--version N]
+    python migrate.py baseline --version N       # marcar 000..N como aplicadas sin ejecutarlas
+    python migrate.py verify                     # comparar checksums
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sys
+import time
+
+from mysql.connector import Error
+from connection import get_connection
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+LOCK_NAME = "schema_migrations"
+
+# MariaDB rechaza ALGORITHM/LOCK que no puede cumplir con estos códigos
+ER_ALTER_OPERATION_NOT_SUPPORTED = 1845
+ER_ALTER_OPERATION_NOT_SUPPORTED_REASON = 1846
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        nombre VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        baseline BOOLEAN NOT NULL DEFAULT 0,
+        duracion_ms INT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+ALTER_TABLE = re.compile(r"^\s*ALTER\s+TABLE\b", re.IGNORECASE)
+CREATE_INDEX = re.compile(r"^\s*CREATE\s+(UNIQUE\s+)?INDEX\b", re.IGNORECASE)
+# Operaciones que en MariaDB reconstruyen la tabla (copia con bloqueo de escritura)
+COPY_OPERATIONS = re.compile(
+    r"\b(MODIFY|CHANGE)\b|CONVERT\s+TO\s+CHARACTER\s+SET|\b(ADD|DROP)\s+PRIMARY\s+KEY|\bENGINE\s*=",
+    re.IGNORECASE,
+)
+
+class Migration:
+    """Archivo de migración"""
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, "rb") as f:
+            content = f.read().replace(b"\r\n", b"\n")
+        self.sql = content.decode("utf-8")
+        self.checksum = hashlib.sha256(content).hexdigest()
+
+    def statements(self):
+        """Sentencias del archivo, sin comentarios de línea"""
+        lines = [line for line in self.sql.splitlines() if not line.strip().startswith("--")]
+        return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+    def __str__(self):
+        return f"{self.version:03d}_{self.name}"
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Migraciones del directorio ordenadas por versión"""
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Versión {version} repetida: {migrations[version].path} y {filename}")
+        migrations[version] = Migration(version, match.group(2), os.path.join(directory, filename))
+    return [migrations[version] for version in sorted(migrations)]
+
+def online_statement(stmt):
+    """La sentencia con ALGORITHM=INPLACE, LOCK=NONE si es un ALTER TABLE / CREATE INDEX"""
+    if re.search(r"\bALGORITHM\s*=|\bLOCK\s*=", stmt, re.IGNORECASE):
+        return stmt
+    if ALTER_TABLE.match(stmt):
+        return stmt + ", ALGORITHM=INPLACE, LOCK=NONE"
+    if CREATE_INDEX.match(stmt):
+        return stmt + " ALGORITHM=INPLACE LOCK=NONE"
+    return stmt
+
+def predicted_lock(migration):
+    """'copia' si alguna sentencia probablemente reconstruye la tabla, 'online' si no"""
+    for stmt in migration.statements():
+        if re.match(r"^\s*TRUNCATE\b", stmt, re.IGNORECASE):
+            return "copia"
+        if ALTER_TABLE.match(stmt) and COPY_OPERATIONS.search(stmt):
+            return "copia"
+    return "online"
+
+def applied_versions(cursor):
+    """{version: (nombre, checksum, baseline)} de schema_version"""
+    cursor.execute(SCHEMA_VERSION_TABLE)
+    cursor.execute("SELECT version, nombre, checksum, baseline FROM schema_version ORDER BY version")
+    return {row[0]: (row[1], row[2], bool(row[3])) for row in cursor.fetchall()}
+
+def checksum_mismatches(migrations, applied):
+    return [m for m in migrations if m.version in applied and applied[m.version][1] != m.checksum]
+
+def status(cursor, migrations, online=False):
+    applied = applied_versions(cursor)
+    mismatched = {m.version for m in checksum_mismatches(migrations, applied)}
+    for m in migrations:
+        if m.version in mismatched:
+            state = "✗ checksum distinto"
+        elif m.version in applied:
+            state = "✓ baseline" if applied[m.version][2] else "✓ aplicada"
+        else:
+            state = "pendiente"
+            if online:
+                state += f" ({predicted_lock(m)})"
+        print(f"{str(m):<45} {state}")
+    known = {m.version for m in migrations}
+    for version, (name, _, _) in applied.items():
+        if version not in known:
+            print(f"{version:03d}_{name:<41} ✗ aplicada pero el archivo no existe")
+    return 1 if mismatched else 0
+
+def verify(cursor, migrations):
+    mismatched = checksum_mismatches(migrations, applied_versions(cursor))
+    for m in mismatched:
+        print(f"✗ {m}: el archivo cambió después de aplicarse")
+    if not mismatched:
+        print("✓ Checksums correctos")
+    return 1 if mismatched else 0
+
+def _execute(cursor, stmt, online, allow_locking):
+    """Ejecuta una sentencia; en modo online retorna False si requiere copiar la tabla y no se permite"""
+    if not online:
+        cursor.execute(stmt)
+        return True
+    try:
+        cursor.execute(online_statement(stmt))
+        return True
+    except Error as e:
+        if e.errno not in (ER_ALTER_OPERATION_NOT_SUPPORTED, ER_ALTER_OPERATION_NOT_SUPPORTED_REASON):
+            raise
+        print(f"  ✗ No se puede en línea: {e.msg}")
+        if not allow_locking:
+            return False
+        print("  Reintentando con bloqueo (--allow-locking)")
+        cursor.execute(stmt)
+        return True
+
+def migrate(cursor, migrations, target=None, online=False, allow_locking=False, dry_run=False):
+    applied = applied_versions(cursor)
+    mismatched = checksum_mismatches(migrations, applied)
+    if mismatched:
+        for m in mismatched:
+            print(f"✗ {m}: el archivo cambió después de aplicarse; no se aplica nada")
+        return 1
+
+    pending = [m for m in migrations if m.version not in applied and (target is None or m.version <= target)]
+    if not pending:
+        print("✓ El esquema está al día")
+        return 0
+
+    for m in pending:
+        print(f"{'[dry-run] ' if dry_run else ''}Aplicando {m} ({predicted_lock(m)})")
+        if dry_run:
+            for stmt in m.statements():
+                print(f"  {online_statement(stmt) if online else stmt};")
+            continue
+
+        start = time.perf_counter()
+        for stmt in m.statements():
+            print(f"  Ejecutando: {online_statement(stmt) if online else stmt}")
+            if not _execute(cursor, stmt, online, allow_locking):
+                print(f"✗ {m} requiere copiar la tabla (bloqueo). Ejecutar en una ventana de mantenimiento con --allow-locking")
+                return 1
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        cursor.execute(
+            "INSERT INTO schema_version (version, nombre, checksum, baseline, duracion_ms) VALUES (%s, %s, %s, 0, %s)",
+            (m.version, m.name, m.checksum, duration_ms),
+        )
+        print(f"✓ {m} aplicada en {duration_ms} ms")
+    return 0
+
+def baseline(cursor, migrations, target):
+    """Registra como aplicadas (sin ejecutarlas) las migraciones hasta `target`"""
+    applied = applied_versions(cursor)
+    for m in migrations:
+        if m.version <= target and m.version not in applied:
+            cursor.execute(
+                "INSERT INTO schema_version (version, nombre, checksum, baseline) VALUES (%s, %s, %s, 1)",
+                (m.version, m.name, m.checksum),
+            )
+            print(f"✓ {m} marcada como aplicada (baseline)")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migraciones versionadas del esquema")
+    parser.add_argument("command", choices=["status", "migrate", "baseline", "verify"])
+    parser.add_argument("--online", action="store_true", help="ALTER con ALGORITHM=INPLACE, LOCK=NONE")
+    parser.add_argument("--allow-locking", action="store_true", help="en modo online, permitir las que copian la tabla")
+    parser.add_argument("--dry-run", action="store_true", help="mostrar las sentencias sin ejecutarlas")
+    parser.add_argument("--version", type=int, help="aplicar/marcar hasta esta versión")
+    args = parser.parse_args(argv)
+
+    if args.command == "baseline" and args.version is None:
+        parser.error("baseline requiere --version")
+
+    migrations = load_migrations()
+    conn = get_connection()
+    if not conn:
+        print("Error: No se pudo conectar a la base de datos")
+        return 2
+
+    cursor = conn.cursor()
+    try:
+        # Un solo runner a la vez
+        cursor.execute("SELECT GET_LOCK(%s, 10)", (LOCK_NAME,))
+        if cursor.fetchone()[0] != 1:
+            print("✗ Otro proceso está aplicando migraciones")
+            return 2
+        try:
+            if args.command == "status":
+                return status(cursor, migrations, args.online)
+            if args.command == "verify":
+                return verify(cursor, migrations)
+            if args.command == "baseline":
+                return baseline(cursor, migrations, args.version)
+            return migrate(cursor, migrations, args.version, args.online, args.allow_locking, args.dry_run)
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    except Error as e:
+        print(f"Error MariaDB: {e}")
+        return 1
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
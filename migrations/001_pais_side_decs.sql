@@ -0,0 +1,3 @@
+-- Antes add_pais_fields.py
+ALTER TABLE pais ADD COLUMN IF NOT EXISTS side BOOLEAN DEFAULT 0 AFTER simbolo;
+ALTER TABLE pais ADD COLUMN IF NOT EXISTS decs INT DEFAULT 0 AFTER side;
@@ -0,0 +1,13 @@
+-- Antes change_pais_id_type.py: el id de país pasa a ser el código ISO de la moneda (MXN, CLP, ...).
+-- El script original además vaciaba pais (TRUNCATE) para recargarla con populate_paises;
+-- eso no forma parte de la migración.
+SET FOREIGN_KEY_CHECKS = 0;
+ALTER TABLE precio DROP FOREIGN KEY IF EXISTS precio_ibfk_2;
+ALTER TABLE precio DROP FOREIGN KEY IF EXISTS precio_ibfk_3;
+ALTER TABLE textos DROP FOREIGN KEY IF EXISTS textos_ibfk_2;
+ALTER TABLE pais MODIFY COLUMN id VARCHAR(5);
+ALTER TABLE textos MODIFY COLUMN id_pais VARCHAR(5);
+ALTER TABLE precio MODIFY COLUMN id_pais VARCHAR(5);
+ALTER TABLE precio ADD CONSTRAINT precio_ibfk_2 FOREIGN KEY (id_pais) REFERENCES pais(id);
+ALTER TABLE textos ADD CONSTRAINT textos_ibfk_2 FOREIGN KEY (id_pais) REFERENCES pais(id);
+SET FOREIGN_KEY_CHECKS = 1;
@@ -0,0 +1,2 @@
+-- Antes alter_conjunto.py
+ALTER TABLE conjunto MODIFY id INT(11) NOT NULL AUTO_INCREMENT;
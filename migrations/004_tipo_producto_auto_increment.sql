@@ -0,0 +1,2 @@
+-- Antes alter_tipo_producto.py
+ALTER TABLE tipo_producto MODIFY id INT(11) NOT NULL AUTO_INCREMENT;
@@ -0,0 +1,3 @@
+-- Antes alter_producto.py
+ALTER TABLE producto MODIFY COLUMN precio_base INT(11);
+ALTER TABLE producto MODIFY id INT(11) NOT NULL AUTO_INCREMENT;
@@ -0,0 +1,2 @@
+-- Antes alter_pertenencia.py
+ALTER TABLE pertenencia MODIFY id INT(11) NOT NULL AUTO_INCREMENT;
@@ -0,0 +1,3 @@
+-- Antes alter_precio.py
+ALTER TABLE precio ADD COLUMN IF NOT EXISTS ambiente VARCHAR(255) AFTER status;
+ALTER TABLE precio MODIFY id INT(11) NOT NULL AUTO_INCREMENT;
@@ -0,0 +1,3 @@
+-- Antes alter_precio_charset.py, _v2 y _v3: convertir toda la tabla chocaba con las
+-- llaves foráneas, así que solo se cambia la columna con emojis (nombre).
+ALTER TABLE precio MODIFY nombre VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
@@ -0,0 +1,3 @@
+-- Antes alter_textos.py
+ALTER TABLE textos MODIFY id INT(11) NOT NULL AUTO_INCREMENT;
+ALTER TABLE textos ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
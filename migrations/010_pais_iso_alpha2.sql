@@ -0,0 +1,3 @@
+-- Código ISO alpha-2 (MX, CL, ...) que usan los filtros ?pais= de /precios.
+-- La columna se agregó a mano en producción; IF NOT EXISTS la deja igual ahí.
+ALTER TABLE pais ADD COLUMN IF NOT EXISTS iso_alpha2 VARCHAR(2) AFTER id;
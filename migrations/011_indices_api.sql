@@ -0,0 +1,27 @@
+-- Índices para los filtros que usa la API (ver index_advisor.py).
+-- InnoDB agrega la llave primaria (id) al final de cada índice secundario. Las
+-- filas salen ordenadas por id (ORDER BY id LIMIT sin filesort) solo cuando hay
+-- igualdad en TODAS las columnas del índice. Si solo se filtra por un prefijo
+-- (p. ej. id_pais sin ambiente en ix_precio_pais_ambiente) el índice reduce las
+-- filas leídas, pero el ORDER BY id sigue haciendo filesort sobre ellas. Abajo se
+-- indica qué combinaciones quedan ordenadas; /precios* se sirve normalmente
+-- desde el catálogo en memoria y estas consultas son el camino sin catálogo.
+
+-- /precios?ambiente= (ordenada)  y  /precios?pais=&ambiente=, /precios/pais/{id}?ambiente= (ordenadas);
+-- /precios?pais= o /precios/pais/{id} sin ambiente usan el prefijo id_pais y hacen filesort
+CREATE INDEX IF NOT EXISTS ix_precio_ambiente ON precio (ambiente);
+CREATE INDEX IF NOT EXISTS ix_precio_pais_ambiente ON precio (id_pais, ambiente);
+
+-- /precios/pertenencia/{id}?ambiente=&pais= (ordenada)  y  POST /precios/pertenencias/lote;
+-- con solo id_pertenencia (o sin ambiente) usa el prefijo y hace filesort
+CREATE INDEX IF NOT EXISTS ix_precio_pertenencia_ambiente_pais ON precio (id_pertenencia, ambiente, id_pais);
+
+-- Conversión ISO alpha-2 -> id de país
+CREATE INDEX IF NOT EXISTS ix_pais_iso_alpha2 ON pais (iso_alpha2);
+
+-- /pertenencias/conjunto/{id} (prefijo id_conjunto: filtra, pero ORDER BY id hace filesort
+-- sobre las pertenencias del conjunto); también garantiza que populate_pertenencia sea idempotente
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pertenencia_conjunto_producto ON pertenencia (id_conjunto, id_producto);
+
+-- /textos/tipo-pais/{tipo}/{pais}  y  POST /textos/lote
+CREATE INDEX IF NOT EXISTS ix_textos_tipo_pais ON textos (id_tipo_producto, id_pais);
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -178,6 +178,24 @@ class PrecioDetallado(BaseModel):
     class Config:
         from_attributes = True
 
+# ============ MODELOS LOTE ============
+# Máximo de elementos por consulta en lote
+LOTE_MAX = 500
+
+class LoteIds(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=LOTE_MAX)
+
+class LotePreciosPertenencia(LoteIds):
+    ambiente: Optional[str] = None
+    pais: Optional[str] = None
+
+class ParTipoPais(BaseModel):
+    id_tipo_producto: int
+    id_pais: str
+
+class LoteTextos(BaseModel):
+    pares: List[ParTipoPais] = Field(..., min_length=1, max_length=LOTE_MAX)
+
 # ============ RESPUESTAS GENÉRICAS ============
 class GenericResponse(BaseModel):
     success: bool
@@ -188,4 +206,6 @@ class ListResponse(BaseModel):
     success: bool
     message: str
     data: List[dict] = []
-    total: int = 0
+    total: Optional[int] = 0
+    total_modo: str = "exacto"
+    next_cursor: Optional[str] = None
@@ -0,0 +1,96 @@
+"""
+Paginación de los endpoints de listas.
+
+Además de skip/limit (OFFSET), cada lista acepta un `cursor` opaco para
+paginar por llave (keyset / seek): la página siguiente se pide con
+`id > último id visto` ordenando por la llave primaria, así que cuesta lo mismo
+en la página 1 que en la 10,000 y el orden es estable.
+
+- `cursor` vacío (`?cursor=`) pide la primera página en modo keyset.
+- La respuesta trae `next_cursor`; es None cuando ya no hay más páginas.
+- Un cursor cuyo id no es del tipo de la llave del endpoint (p. ej. el de
+  /paises, con ids de texto, usado en /conjuntos) se rechaza con 400.
+"""
+
+import base64
+import json
+
+from fastapi import HTTPException
+
+def encode_cursor(last_id):
+    """Cursor opaco que apunta después de `last_id`"""
+    data = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, id_type=int):
+    """Último id visto según el cursor (de tipo `id_type`), o None si es la primera página"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))["id"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    # type() exacto: True/False no valen como id entero
+    if type(last_id) is not id_type:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return last_id
+
+def paginate_sql(query, params, conditions, id_column, skip, limit, cursor, id_type=int):
+    """
+    Completa una consulta con WHERE, ORDER BY por la llave y la paginación.
+
+    `conditions` son condiciones SQL ya parametrizadas con `params`. En modo
+    keyset (cursor no es None) se pide una fila extra para saber si hay otra página.
+    `id_type` es el tipo de la llave, con el que se valida el cursor.
+    """
+    conditions = list(conditions)
+    params = list(params)
+    if cursor is not None:
+        after = decode_cursor(cursor, id_type)
+        if after is not None:
+            conditions.append(f"{id_column} > %s")
+            params.append(after)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {id_column}"
+    if cursor is not None:
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    else:
+        query += " LIMIT %s OFFSET %s"
+        params.extend([limit, skip])
+    return query, params
+
+def split_page(items, limit, cursor, key):
+    """
+    Recorta las filas pedidas con paginate_sql a `limit` y calcula el next_cursor.
+    En modo offset (cursor None) no hay next_cursor.
+    """
+    if cursor is None:
+        return items, None
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(key(items[-1]))
+    return items, None
+
+def seek(items, after, key):
+    """Posición del primer elemento con llave > `after` en una lista ordenada por esa llave"""
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(items[mid]) <= after:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def paginate_list(items, skip, limit, cursor, key, id_type=int):
+    """Página de una lista en memoria ordenada por `key` (de tipo `id_type`; offset o keyset) y su next_cursor"""
+    if cursor is None:
+        return items[skip:skip + limit], None
+    after = decode_cursor(cursor, id_type)
+    start = seek(items, after, key) if after is not None else 0
+    page = items[start:start + limit]
+    next_cursor = encode_cursor(key(page[-1])) if start + limit < len(items) and page else None
+    return page, next_cursor
@@ -1,30 +1,31 @@
 from connection import get_connection
+from bulk_loader import BulkLoader
 
 def populate_conjunto():
     conn = get_connection()
     if not conn:
-        return
+        return False
 
     cursor = conn.cursor()
     try:
         # Insert the row
         # ID will be 1 (auto_increment)
         # created_at will be current timestamp (default)
-        sql = "INSERT INTO conjunto (sitio, nombre) VALUES (%s, %s)"
         values = ("splashmix", "normal")
         
-        print(f"Executing: {sql} with values {values}")
-        cursor.execute(sql, values)
-        conn.commit()
+        print(f"Inserting into conjunto: {values}")
+        BulkLoader("conjunto", ["sitio", "nombre"], conn=conn).load([values])
         print("Row inserted successfully.")
         
         # Verify
         cursor.execute("SELECT * FROM conjunto")
         row = cursor.fetchone()
         print(f"Inserted row: {row}")
+        return True
         
     except Exception as e:
         print(f"Error inserting row: {e}")
+        return False
     finally:
         cursor.close()
         conn.close()
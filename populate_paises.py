@@ -1,74 +1,57 @@
-import pandas as pd
+import argparse
 from connection import get_connection
-from datetime import datetime
-import sys
+from bulk_loader import BulkLoader, map_columns, now, read_frame, read_chunks, stream_rows, STREAM_CHUNK_SIZE
 
-def populate_paises():
-    file_path = 'paises.xlsx'
-    
-    try:
-        df = pd.read_excel(file_path)
-    except Exception as e:
-        print(f"Error reading Excel file: {e}")
-        return
+# Mapping
+# User said: "iso sea el id". 
+PAISES_MAPPING = {
+    "id": "iso",
+    "nombre": "nombre",
+    "moneda": "moneda",
+    "moneda_tic": "iso", # User said "iso es moneda_tic también"
+    "simbolo": "simbolo",
+    "side": lambda df: df["side"].astype(bool).astype(int), # Ensure it's 0 or 1
+    "decs": "decs",
+    "created_at": lambda df: now(),
+}
+
+def populate_paises(file_path='paises.xlsx', stream=False, chunk_size=STREAM_CHUNK_SIZE):
+    if stream:
+        # Read the file in chunks of chunk_size rows while writing
+        rows = stream_rows(read_chunks(file_path, header=0, chunk_size=chunk_size), PAISES_MAPPING)
+    else:
+        try:
+            df = read_frame(file_path)
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return False
+        rows = map_columns(df, PAISES_MAPPING)
 
     conn = get_connection()
     if not conn:
         print("Could not connect to database")
-        return
+        return False
 
-    cursor = conn.cursor()
+    loader = BulkLoader(
+        "pais", list(PAISES_MAPPING),
+        update_columns=["nombre", "moneda", "moneda_tic", "simbolo", "side", "decs", "created_at"],
+        conn=conn,
+    )
     
-    # Check if table is empty or if we should update?
-    # User said "poblaré", usually means insert.
-    # I will use INSERT IGNORE or REPLACE or just INSERT and handle errors.
-    # Since we are setting ID explicitly, we should probably use INSERT INTO ...
-    
-    rows_inserted = 0
-    rows_errors = 0
-
-    for index, row in df.iterrows():
-        try:
-            # Mapping
-            # User said: "iso sea el id". 
-            
-            p_id = row['iso'] 
-            nombre = row['nombre']
-            moneda = row['moneda']
-            moneda_tic = row['iso'] # User said "iso es moneda_tic también"
-            simbolo = row['simbolo']
-            side = 1 if row['side'] else 0 # Ensure it's 0 or 1
-            decs = row['decs']
-            created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # SQL Query
-            sql = """
-                INSERT INTO pais (id, nombre, moneda, moneda_tic, simbolo, side, decs, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                nombre = VALUES(nombre),
-                moneda = VALUES(moneda),
-                moneda_tic = VALUES(moneda_tic),
-                simbolo = VALUES(simbolo),
-                side = VALUES(side),
-                decs = VALUES(decs),
-                created_at = VALUES(created_at)
-            """
-            
-            values = (p_id, nombre, moneda, moneda_tic, simbolo, side, decs, created_at)
-            
-            cursor.execute(sql, values)
-            rows_inserted += 1
-            
-        except Exception as e:
-            print(f"Error inserting row {index}: {e}")
-            rows_errors += 1
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    print(f"Finished. Inserted/Updated: {rows_inserted}, Errors: {rows_errors}")
+    try:
+        stats = loader.load(rows)
+        print(f"Finished. Inserted/Updated: {stats.rows}")
+        return True
+    except Exception as e:
+        print(f"Error loading paises, nothing was written: {e}")
+        return False
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
-    populate_paises()
+    parser = argparse.ArgumentParser(description="Load pais from an Excel or CSV file")
+    parser.add_argument("file", nargs="?", default='paises.xlsx')
+    parser.add_argument("--stream", action="store_true", help="read the file in chunks instead of all at once")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    args = parser.parse_args()
+    populate_paises(args.file, stream=args.stream, chunk_size=args.chunk_size)
@@ -1,50 +1,81 @@
+import argparse
 from connection import get_connection
-from datetime import datetime
 
-def populate_pertenencia():
+UNIQUE_KEY = "uq_pertenencia_conjunto_producto"
+
+def has_unique_key(cursor):
+    """True if pertenencia has the UNIQUE (id_conjunto, id_producto) key from migrations/011_indices_api.sql"""
+    cursor.execute("""
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'pertenencia' AND INDEX_NAME = %s
+    """, (UNIQUE_KEY,))
+    if cursor.fetchone():
+        return True
+    print(f"Missing unique key {UNIQUE_KEY} on pertenencia; run `python migrate.py migrate` first")
+    return False
+
+def populate_pertenencia(conjuntos=None, own_products=False):
+    """
+    Create every missing conjunto x producto pertenencia with one anti-join INSERT.
+
+    conjuntos: ids to generate for (default: all). own_products: only pair each
+    conjunto with the productos whose id_conjunto points to it.
+    """
     conn = get_connection()
     if not conn:
-        return
+        return False
 
     cursor = conn.cursor()
-    
+
     try:
-        # Get Conjunto ID (assuming only 1 exists or taking the first one)
-        cursor.execute("SELECT id FROM conjunto LIMIT 1")
-        conjunto_row = cursor.fetchone()
-        if not conjunto_row:
-            print("No conjunto found.")
-            return
-        conjunto_id = conjunto_row[0]
-        print(f"Using Conjunto ID: {conjunto_id}")
-
-        # Get all Producto IDs
-        cursor.execute("SELECT id FROM producto")
-        productos = cursor.fetchall()
-        print(f"Found {len(productos)} products.")
-
-        rows_inserted = 0
-        for prod in productos:
-            prod_id = prod[0]
-            
-            # Check if already exists to avoid duplicates (optional but good practice)
-            cursor.execute("SELECT id FROM pertenencia WHERE id_conjunto = %s AND id_producto = %s", (conjunto_id, prod_id))
-            if cursor.fetchone():
-                print(f"Pertenencia for Conjunto {conjunto_id} and Producto {prod_id} already exists. Skipping.")
-                continue
-
-            sql = "INSERT INTO pertenencia (id_conjunto, id_producto) VALUES (%s, %s)"
-            cursor.execute(sql, (conjunto_id, prod_id))
-            rows_inserted += 1
+        if not has_unique_key(cursor):
+            return False
 
+        conditions = []
+        params = []
+        if conjuntos:
+            conditions.append("c.id IN (" + ", ".join(["%s"] * len(conjuntos)) + ")")
+            params.extend(conjuntos)
+        if own_products:
+            conditions.append("p.id_conjunto = c.id")
+        where = (" AND " + " AND ".join(conditions)) if conditions else ""
+
+        # Pairs that should exist, and how many already do
+        cursor.execute(f"""
+            SELECT COUNT(*), COUNT(pe.id)
+            FROM conjunto c
+            CROSS JOIN producto p
+            LEFT JOIN pertenencia pe ON pe.id_conjunto = c.id AND pe.id_producto = p.id
+            WHERE 1 = 1{where}
+        """, params)
+        expected, existing = cursor.fetchone()
+
+        # IGNORE + unique key keep it idempotent even if two runs overlap
+        cursor.execute(f"""
+            INSERT IGNORE INTO pertenencia (id_conjunto, id_producto)
+            SELECT c.id, p.id
+            FROM conjunto c
+            CROSS JOIN producto p
+            LEFT JOIN pertenencia pe ON pe.id_conjunto = c.id AND pe.id_producto = p.id
+            WHERE pe.id IS NULL{where}
+            ORDER BY c.id, p.id
+        """, params)
+        inserted = cursor.rowcount
         conn.commit()
-        print(f"Finished. Inserted: {rows_inserted} rows.")
+
+        print(f"Finished. Pairs: {expected}, already existing: {existing}, inserted: {inserted}.")
+        return True
 
     except Exception as e:
         print(f"Error: {e}")
+        return False
     finally:
         cursor.close()
         conn.close()
 
 if __name__ == "__main__":
-    populate_pertenencia()
+    parser = argparse.ArgumentParser(description="Create the missing conjunto x producto pertenencias")
+    parser.add_argument("--conjunto", type=int, action="append", help="conjunto id (repeatable, default: all)")
+    parser.add_argument("--own-products", action="store_true", help="only productos whose id_conjunto is the conjunto")
+    args = parser.parse_args()
+    populate_pertenencia(args.conjunto, args.own_products)
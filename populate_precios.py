@@ -1,6 +1,6 @@
-import json
+import sys
 from connection import get_connection
-from datetime import datetime
+from precio_loader import load_precios, read_price_list
 
 precios_dev = [
     {"id":0, "nombre":"🃏1 imagen", "precio":"$30 mxn", "cxt":"($30/imagen)",  "mode": "payment", "price_id": "price_1SDXvuROVpWRmEfBsAGp37kf",  "imagenes": 1},
@@ -11,80 +11,34 @@ precios_dev = [
     {"id":5, "nombre":"🃏1000 imágenes", "precio":"$1900 mxn", "cxt":"($1.9/imagen)",  "mode": "payment", "price_id": "price_1S1GQPROVpWRmEfBYv6SoeuO", "imagenes": 1000},
 ]
 
-def populate_precios():
+def nombre_precio(item, context):
+    # The dev list carries its own display name
+    return item["nombre"]
+
+def populate_precios(path=None):
+    """Insert the price list (the precios_dev literal, or a .json/.jsonl/.csv file) for MXN"""
     conn = get_connection()
     if not conn:
-        return
+        return False
 
-    cursor = conn.cursor()
-    
-    rows_inserted = 0
     id_pais = "MXN"
     status = "activo"
     ambiente = "sandbox"
-    created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    items = read_price_list(path) if path else precios_dev
 
     try:
-        # Check if MXN exists
-        cursor.execute("SELECT id FROM pais WHERE id = %s", (id_pais,))
-        if not cursor.fetchone():
-            print(f"Error: Pais {id_pais} not found.")
-            return
-
-        for item in precios_dev:
-            imagenes = item["imagenes"]
-            price_id = item["price_id"]
-            nombre = item["nombre"]
-            
-            # Find product by cantidad (imagenes)
-            # Assuming unique quantity per product for now or taking the first one
-            cursor.execute("SELECT id, precio_base, cantidad FROM producto WHERE cantidad = %s", (imagenes,))
-            prod_row = cursor.fetchone()
-            
-            if not prod_row:
-                print(f"Warning: No product found for {imagenes} images. Skipping.")
-                continue
-                
-            prod_id = prod_row[0]
-            precio_base = prod_row[1] # This is int now
-            cantidad = prod_row[2]
-            
-            # Find pertenencia for this product
-            # Assuming we want the pertenencia for the 'splashmix' conjunto (id 1) or just any pertenencia for this product
-            # The user said "tenemos 5 pertenencias que a su vez están relacionadas a un producto".
-            # I'll search for pertenencia by product_id
-            cursor.execute("SELECT id FROM pertenencia WHERE id_producto = %s", (prod_id,))
-            pert_row = cursor.fetchone()
-            
-            if not pert_row:
-                print(f"Warning: No pertenencia found for product {prod_id}. Skipping.")
-                continue
-                
-            id_pertenencia = pert_row[0]
-            
-            # Calculate fields
-            cantidad_precio = precio_base
-            ratio_imagen = int(cantidad_precio / cantidad)
-            
-            # Insert
-            sql = """
-                INSERT INTO precio (nombre, id_pertenencia, id_pais, price_id, cantidad_precio, ratio_imagen, status, ambiente, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            values = (nombre, id_pertenencia, id_pais, price_id, cantidad_precio, ratio_imagen, status, ambiente, created_at)
-            
-            cursor.execute(sql, values)
-            rows_inserted += 1
-            print(f"Inserted price for {imagenes} images (Product ID: {prod_id}, Pertenencia ID: {id_pertenencia})")
-
-        conn.commit()
-        print(f"Finished. Inserted: {rows_inserted} rows.")
+        stats = load_precios(conn, items, id_pais, status, ambiente, nombre_precio)
+        if stats is None:
+            return False
+        print(f"Finished. Inserted: {stats.rows} rows.")
+        return True
 
     except Exception as e:
         print(f"Error: {e}")
+        return False
     finally:
-        cursor.close()
         conn.close()
 
 if __name__ == "__main__":
-    populate_precios()
+    # Optional argument: price list file
+    populate_precios(sys.argv[1] if len(sys.argv) > 1 else None)
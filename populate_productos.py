@@ -1,67 +1,56 @@
-import pandas as pd
+import argparse
 from connection import get_connection
-from datetime import datetime
+from bulk_loader import BulkLoader, map_columns, now, read_frame, read_chunks, stream_rows, STREAM_CHUNK_SIZE
 
-def populate_productos():
-    file_path = 'productos.xlsx'
-    
-    try:
-        # Read with header=1 based on previous check
-        df = pd.read_excel(file_path, header=1)
-    except Exception as e:
-        print(f"Error reading Excel file: {e}")
-        return
+# Mapping
+# We will use the ID from Excel to ensure consistency if referenced elsewhere
+PRODUCTOS_MAPPING = {
+    "id": "id",
+    "nombre": "nombre",
+    "cantidad": "cantidad",
+    "id_tipo_producto": "id_tipo_producto",
+    "id_conjunto": "id_conjunto",
+    "precio_base": "precio_base",
+    "created_at": lambda df: now(),
+}
+
+def populate_productos(file_path='productos.xlsx', stream=False, chunk_size=STREAM_CHUNK_SIZE):
+    if stream:
+        # Read the file in chunks of chunk_size rows while writing
+        rows = stream_rows(read_chunks(file_path, header=1, chunk_size=chunk_size), PRODUCTOS_MAPPING)
+    else:
+        try:
+            df = read_frame(file_path, header=1)
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return False
+        rows = map_columns(df, PRODUCTOS_MAPPING)
 
     conn = get_connection()
     if not conn:
         print("Could not connect to database")
-        return
-
-    cursor = conn.cursor()
-    
-    rows_inserted = 0
-    rows_errors = 0
-
-    for index, row in df.iterrows():
-        try:
-            # Mapping
-            # We will use the ID from Excel to ensure consistency if referenced elsewhere
-            p_id = row['id']
-            nombre = row['nombre']
-            cantidad = row['cantidad']
-            id_tipo_producto = row['id_tipo_producto']
-            id_conjunto = row['id_conjunto']
-            precio_base = row['precio_base']
-            created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return False
 
-            # SQL Query
-            # Including ID in insert
-            sql = """
-                INSERT INTO producto (id, nombre, cantidad, id_tipo_producto, id_conjunto, precio_base, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                nombre = VALUES(nombre),
-                cantidad = VALUES(cantidad),
-                id_tipo_producto = VALUES(id_tipo_producto),
-                id_conjunto = VALUES(id_conjunto),
-                precio_base = VALUES(precio_base),
-                created_at = VALUES(created_at)
-            """
-            
-            values = (p_id, nombre, cantidad, id_tipo_producto, id_conjunto, precio_base, created_at)
-            
-            cursor.execute(sql, values)
-            rows_inserted += 1
-            
-        except Exception as e:
-            print(f"Error inserting row {index} (ID: {row.get('id')}): {e}")
-            rows_errors += 1
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    loader = BulkLoader(
+        "producto", list(PRODUCTOS_MAPPING),
+        update_columns=["nombre", "cantidad", "id_tipo_producto", "id_conjunto", "precio_base", "created_at"],
+        conn=conn,
+    )
     
-    print(f"Finished. Inserted/Updated: {rows_inserted}, Errors: {rows_errors}")
+    try:
+        stats = loader.load(rows)
+        print(f"Finished. Inserted/Updated: {stats.rows}")
+        return True
+    except Exception as e:
+        print(f"Error loading productos, nothing was written: {e}")
+        return False
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
-    populate_productos()
+    parser = argparse.ArgumentParser(description="Load producto from an Excel or CSV file")
+    parser.add_argument("file", nargs="?", default='productos.xlsx')
+    parser.add_argument("--stream", action="store_true", help="read the file in chunks instead of all at once")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    args = parser.parse_args()
+    populate_productos(args.file, stream=args.stream, chunk_size=args.chunk_size)
@@ -1,57 +1,49 @@
-import pandas as pd
+import argparse
 from connection import get_connection
-from datetime import datetime
+from bulk_loader import BulkLoader, map_columns, now, read_frame, read_chunks, stream_rows, STREAM_CHUNK_SIZE
 
-def populate_textos():
-    file_path = 'paises.xlsx'
-    
-    try:
-        df = pd.read_excel(file_path)
-    except Exception as e:
-        print(f"Error reading Excel file: {e}")
-        return
+# Mapping
+TEXTOS_MAPPING = {
+    "id_tipo_producto": lambda df: 1, # Fixed value for id_tipo_producto
+    "id_pais": "iso", # Using ISO as ID for pais
+    "unidad": "singular",
+    "unidades": "plural",
+    "created_at": lambda df: now(),
+}
+
+def populate_textos(file_path='paises.xlsx', stream=False, chunk_size=STREAM_CHUNK_SIZE):
+    if stream:
+        # Read the file in chunks of chunk_size rows while writing
+        rows = stream_rows(read_chunks(file_path, header=0, chunk_size=chunk_size), TEXTOS_MAPPING)
+    else:
+        try:
+            df = read_frame(file_path)
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return False
+        rows = map_columns(df, TEXTOS_MAPPING)
 
     conn = get_connection()
     if not conn:
         print("Could not connect to database")
-        return
+        return False
 
-    cursor = conn.cursor()
+    loader = BulkLoader("textos", list(TEXTOS_MAPPING), conn=conn)
     
-    rows_inserted = 0
-    rows_errors = 0
-    
-    # Fixed value for id_tipo_producto
-    id_tipo_producto = 1
-
-    for index, row in df.iterrows():
-        try:
-            # Mapping
-            id_pais = row['iso'] # Using ISO as ID for pais
-            unidad = row['singular']
-            unidades = row['plural']
-            created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # SQL Query
-            sql = """
-                INSERT INTO textos (id_tipo_producto, id_pais, unidad, unidades, created_at)
-                VALUES (%s, %s, %s, %s, %s)
-            """
-            
-            values = (id_tipo_producto, id_pais, unidad, unidades, created_at)
-            
-            cursor.execute(sql, values)
-            rows_inserted += 1
-            
-        except Exception as e:
-            print(f"Error inserting row {index} (Pais: {row.get('iso')}): {e}")
-            rows_errors += 1
-
-    conn.commit()
-    cursor.close()
-    conn.close()
-    
-    print(f"Finished. Inserted: {rows_inserted}, Errors: {rows_errors}")
+    try:
+        stats = loader.load(rows)
+        print(f"Finished. Inserted: {stats.rows}")
+        return True
+    except Exception as e:
+        print(f"Error loading textos, nothing was written: {e}")
+        return False
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
-    populate_textos()
+    parser = argparse.ArgumentParser(description="Load textos from an Excel or CSV file")
+    parser.add_argument("file", nargs="?", default='paises.xlsx')
+    parser.add_argument("--stream", action="store_true", help="read the file in chunks instead of all at once")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    args = parser.parse_args()
+    populate_textos(args.file, stream=args.stream, chunk_size=args.chunk_size)
@@ -0,0 +1,216 @@
+"""
+Catálogo materializado de precios (PrecioDetallado) en memoria.
+
+El catálogo de precios es pequeño y solo cambia cuando se corren los scripts
+populate_*, así que en lugar de repetir el JOIN de 6 tablas en cada request
+se arma una foto (snapshot) completa al arrancar, con índices secundarios por
+id, id_pertenencia, id_pais y ambiente. Las lecturas de /precios* pasan a ser
+búsquedas en diccionarios.
+
+La foto se reconstruye:
+- a demanda (rebuild(), usado por POST /cache/invalidar),
+- cuando cambia alguna tabla de origen (se revisa cada PRECIO_CATALOG_CHECK_INTERVAL
+  segundos con UPDATE_TIME de information_schema y las versiones de la caché de referencia),
+- y en cualquier caso al cumplir PRECIO_CATALOG_MAX_AGE segundos.
+
+UPDATE_TIME tiene resolución de un segundo: una escritura en el mismo segundo
+en que se tomó la huella no la cambia. Si algún UPDATE_TIME cae en el segundo
+en curso del servidor, la huella queda como pendiente y la siguiente revisión
+reconstruye la foto, así un cambio tarda como mucho
+PRECIO_CATALOG_CHECK_INTERVAL segundos en verse. Quien escriba precios y
+necesite verlos de inmediato puede llamar a POST /cache/invalidar.
+
+Cada precio de la foto es un Record compacto (records.py, sin un dict por
+fila). Los listados serializan solo la página que devuelven (fast_json.py).
+
+La foto (mapeo de filas e índices) se arma en un hilo aparte
+(asyncio.to_thread), fuera del event loop y sin ocupar los hilos del executor
+de db.py, que quedan para las consultas; en el loop solo se reemplaza la
+referencia. Mientras se reconstruye se sigue sirviendo la foto anterior.
+PRECIO_CATALOG_ENABLED=0 desactiva el catálogo y los endpoints vuelven a SQL.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from datetime import timedelta
+
+import db
+import metrics
+from catalog_cache import reference_cache, ci_key
+from queries import PRECIO
+from statements import prepared
+
+logger = logging.getLogger(__name__)
+
+PRECIO_CATALOG_ENABLED = os.getenv("PRECIO_CATALOG_ENABLED", "1") != "0"
+PRECIO_CATALOG_CHECK_INTERVAL = float(os.getenv("PRECIO_CATALOG_CHECK_INTERVAL", 30))
+PRECIO_CATALOG_MAX_AGE = float(os.getenv("PRECIO_CATALOG_MAX_AGE", 3600))
+
+# Tablas de las que sale el catálogo (además de las de referencia en caché)
+SOURCE_TABLES = ("precio", "pertenencia", "producto")
+
+PRECIO_POR_ID = PRECIO.by_id
+PRECIO_CATALOGO = prepared("precio_catalogo", PRECIO.sql + " ORDER BY pr.id")
+
+SIGNATURE_QUERY = """
+    SELECT TABLE_NAME, UPDATE_TIME, TABLE_ROWS, NOW(6)
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN (%s, %s, %s)
+    ORDER BY TABLE_NAME
+"""
+
+def same_second(update_time, now):
+    """
+    True si UPDATE_TIME cae en el segundo en curso del servidor (`now`, NOW(6)):
+    otra escritura en ese mismo segundo no lo cambiaría, así que todavía no
+    sirve como versión
+    """
+    return update_time is not None and now < update_time + timedelta(seconds=1)
+
+class PrecioSnapshot:
+    """Foto inmutable del catálogo de precios con sus índices"""
+
+    def __init__(self, precios, signature, version):
+        self.precios = precios
+        self.by_id = {}
+        self.by_pertenencia = {}
+        self.by_pais = {}
+        self.by_ambiente = {}
+        for precio in precios:
+            self.by_id[precio.id] = precio
+            self.by_pertenencia.setdefault(precio.id_pertenencia, []).append(precio)
+            self.by_pais.setdefault(ci_key(precio.id_pais), []).append(precio)
+            self.by_ambiente.setdefault(ci_key(precio.ambiente), []).append(precio)
+        self.signature = signature
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def get(self, precio_id):
+        """Record del precio, o None"""
+        return self.by_id.get(precio_id)
+
+    def filter(self, id_pertenencia=None, id_pais=None, ambiente=None):
+        """Records de los precios (ordenados por id) que cumplen todos los filtros dados"""
+        candidatos = []
+        if id_pertenencia is not None:
+            candidatos.append(self.by_pertenencia.get(id_pertenencia, []))
+        if id_pais:
+            candidatos.append(self.by_pais.get(ci_key(id_pais), []))
+        if ambiente:
+            candidatos.append(self.by_ambiente.get(ci_key(ambiente), []))
+        if not candidatos:
+            return self.precios
+
+        # Se recorre el índice más chico y se filtra por el resto de condiciones
+        base = min(candidatos, key=len)
+        if len(candidatos) == 1:
+            return base
+        pais_key = ci_key(id_pais) if id_pais else None
+        ambiente_key = ci_key(ambiente) if ambiente else None
+        return [
+            p for p in base
+            if (id_pertenencia is None or p.id_pertenencia == id_pertenencia)
+            and (pais_key is None or ci_key(p.id_pais) == pais_key)
+            and (ambiente_key is None or ci_key(p.ambiente) == ambiente_key)
+        ]
+
+def _snapshot_from_rows(rows, dims, signature):
+    """Foto armada a partir de las filas de PRECIO_CATALOGO (corre en un hilo aparte)"""
+    map_record = PRECIO.map_record
+    # Versión: las filas y las versiones de la caché de referencia de las que salen los campos completados
+    digest = hashlib.sha1(repr(signature[1]).encode("utf-8"))
+    for row in rows:
+        digest.update(repr(row).encode("utf-8"))
+    return PrecioSnapshot([map_record(row, dims) for row in rows], signature, digest.hexdigest()[:16])
+
+class PrecioCatalog:
+    """Administra la foto vigente del catálogo y su reconstrucción"""
+
+    def __init__(self, enabled=PRECIO_CATALOG_ENABLED):
+        self.enabled = enabled
+        self._snapshot = None
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+        self._last_check = 0.0
+        self._stale = False
+
+    async def _signature(self):
+        """Huella de cambios de las tablas de origen + versiones de la caché de referencia"""
+        try:
+            rows = await db.fetch_all(SIGNATURE_QUERY, SOURCE_TABLES)
+        except Exception as e:
+            # Sin information_schema se depende solo de PRECIO_CATALOG_MAX_AGE
+            logger.warning("No se pudo leer UPDATE_TIME de las tablas de precio: %s", e)
+            tablas = None
+        else:
+            tablas = tuple((name, update_time, table_rows) for name, update_time, table_rows, _ in rows)
+            if any(same_second(update_time, now) for _, update_time, _, now in rows):
+                # Pendiente: un objeto nuevo no es igual a ninguna huella, la siguiente revisión reconstruye
+                tablas += (object(),)
+        return (tablas, tuple(sorted(reference_cache.versions().items())))
+
+    async def _build(self):
+        signature = await self._signature()
+        rows = await db.fetch_all(PRECIO_CATALOGO)
+        dims = await PRECIO.dimensions()
+        # Las dimensiones pudieron recargarse al leerlas
+        signature = (signature[0], tuple(sorted(reference_cache.versions().items())))
+        snapshot = await asyncio.to_thread(_snapshot_from_rows, rows, dims, signature)
+        self._snapshot = snapshot
+        self._stale = False
+        self._last_check = time.monotonic()
+        logger.info("Catálogo de precios construido: %d precios (versión %s)", len(snapshot.precios), snapshot.version)
+        return snapshot
+
+    async def rebuild(self):
+        """Reconstruye la foto completa del catálogo"""
+        async with self._lock:
+            return await self._build()
+
+    async def _refresh_if_changed(self):
+        # La tarea nace dentro de un request; su trabajo no es parte de él
+        metrics.untrack()
+        try:
+            snapshot = self._snapshot
+            # Refresca la caché de referencia si venció, para comparar sus versiones
+            await PRECIO.dimensions()
+            expired = time.monotonic() - snapshot.built_at >= PRECIO_CATALOG_MAX_AGE
+            if self._stale or expired or await self._signature() != snapshot.signature:
+                await self.rebuild()
+        except Exception as e:
+            logger.warning("No se pudo actualizar el catálogo de precios: %s", e)
+        finally:
+            self._refresh_task = None
+
+    async def current(self):
+        """
+        Foto vigente del catálogo, o None si el catálogo está desactivado.
+
+        La primera llamada construye la foto; después, si toca revisar cambios,
+        se revisa en segundo plano y se responde con la foto actual.
+        """
+        if not self.enabled:
+            return None
+        if self._snapshot is None:
+            async with self._lock:
+                if self._snapshot is None:
+                    await self._build()
+            return self._snapshot
+
+        now = time.monotonic()
+        if self._refresh_task is None and (self._stale or now - self._last_check >= PRECIO_CATALOG_CHECK_INTERVAL):
+            self._last_check = now
+            self._refresh_task = asyncio.create_task(self._refresh_if_changed())
+        return self._snapshot
+
+    def invalidate(self):
+        """Marca la foto para reconstruirse en la siguiente lectura"""
+        self._stale = True
+
+    def version(self):
+        return self._snapshot.version if self._snapshot is not None else None
+
+precio_catalog = PrecioCatalog()
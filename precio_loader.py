@@ -0,0 +1,108 @@
+"""
+Shared resolution stage for populate_precios / populate_precios_prod.
+
+Instead of two queries per price item (producto by cantidad, then its
+pertenencia), producto/pertenencia/conjunto/tipo_producto are read once into
+in-memory maps, every item is resolved against them and the resulting rows
+are written with the BulkLoader.
+
+Price lists can come from the literals in the scripts or from a file:
+- .json: a list of items,
+- .jsonl: one item per line (streamed),
+- .csv: one item per row with a header (streamed).
+Each item needs at least "imagenes" and "price_id" ("nombre" for the dev list).
+"""
+
+import csv
+import json
+
+from bulk_loader import BulkLoader, now
+
+PRECIO_COLUMNS = ["nombre", "id_pertenencia", "id_pais", "price_id", "cantidad_precio", "ratio_imagen", "status", "ambiente", "created_at"]
+
+def read_price_list(path):
+    """Items of a price list file (.json, .jsonl or .csv)"""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for item in csv.DictReader(f):
+                item["imagenes"] = int(item["imagenes"])
+                yield item
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+
+class LookupMaps:
+    """producto/pertenencia/conjunto/tipo_producto in memory, loaded with one query per table"""
+
+    def __init__(self, cursor):
+        # Lowest id wins when several productos share a cantidad
+        cursor.execute("SELECT id, precio_base, cantidad, id_tipo_producto, id_conjunto FROM producto ORDER BY id")
+        self.producto_by_cantidad = {}
+        for row in cursor.fetchall():
+            self.producto_by_cantidad.setdefault(row[2], row)
+
+        cursor.execute("SELECT id, id_producto FROM pertenencia ORDER BY id")
+        self.pertenencia_by_producto = {}
+        for pert_id, prod_id in cursor.fetchall():
+            self.pertenencia_by_producto.setdefault(prod_id, pert_id)
+
+        cursor.execute("SELECT id, sitio FROM conjunto")
+        self.sitio_by_conjunto = dict(cursor.fetchall())
+
+        cursor.execute("SELECT id, nombre FROM tipo_producto")
+        self.tipo_by_id = dict(cursor.fetchall())
+
+def resolve(items, maps, id_pais, status, ambiente, nombre):
+    """
+    Rows for the precio table (in PRECIO_COLUMNS order), one per item that resolves.
+
+    `nombre(item, context)` builds the price name; context has id_pais, sitio,
+    cantidad, tipo_producto and ambiente.
+    """
+    created_at = now()
+    for item in items:
+        imagenes = item["imagenes"]
+
+        # Find product by cantidad (imagenes)
+        prod_row = maps.producto_by_cantidad.get(imagenes)
+        if not prod_row:
+            print(f"Warning: No product found for {imagenes} images. Skipping.")
+            continue
+        prod_id, precio_base, cantidad, id_tipo_producto, id_conjunto = prod_row
+
+        # Find pertenencia for this product
+        id_pertenencia = maps.pertenencia_by_producto.get(prod_id)
+        if id_pertenencia is None:
+            print(f"Warning: No pertenencia found for product {prod_id}. Skipping.")
+            continue
+
+        # Calculate fields
+        cantidad_precio = precio_base
+        ratio_imagen = int(cantidad_precio / cantidad)
+
+        context = {
+            "id_pais": id_pais, "sitio": maps.sitio_by_conjunto.get(id_conjunto), "cantidad": cantidad,
+            "tipo_producto": maps.tipo_by_id.get(id_tipo_producto), "ambiente": ambiente,
+        }
+        yield (nombre(item, context), id_pertenencia, id_pais, item["price_id"], cantidad_precio, ratio_imagen, status, ambiente, created_at)
+
+def load_precios(conn, items, id_pais, status, ambiente, nombre):
+    """Resolve every item in memory and insert the resulting precios in batches. Returns the LoadStats, or None if the pais does not exist"""
+    cursor = conn.cursor()
+    try:
+        # Check if the pais exists
+        cursor.execute("SELECT id FROM pais WHERE id = %s", (id_pais,))
+        if not cursor.fetchone():
+            print(f"Error: Pais {id_pais} not found.")
+            return None
+        maps = LookupMaps(cursor)
+    finally:
+        cursor.close()
+
+    rows = resolve(items, maps, id_pais, status, ambiente, nombre)
+    return BulkLoader("precio", PRECIO_COLUMNS, conn=conn).load(rows)
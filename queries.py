@@ -0,0 +1,154 @@
+"""
+Definiciones declarativas de las consultas de la API.
+
+Cada recurso se describe una sola vez como un Query: la tabla (con sus JOIN),
+las columnas del SELECT con la llave que llevan en la respuesta y los campos que
+se completan con las tablas de referencia en caché (conjunto, tipo_producto, pais).
+Al definirse se compilan:
+
+- el SELECT (`sql`) y la consulta por id (`by_id`, sentencia preparada),
+- un mapeador fila -> dict (`map_row`) generado como una función con el dict
+  literal, igual de rápido que escribirlo a mano y sin índices row[n] en los endpoints,
+- un mapeador fila -> Record (`map_record`, ver records.py) para conjuntos
+  grandes que se guardan en memoria, como la foto del catálogo de precios.
+
+Los endpoints solo eligen filtros y paginación; cualquier cambio de columnas u
+optimización del mapeo se hace aquí y aplica a todos.
+"""
+
+from operator import itemgetter
+
+from catalog_cache import reference_cache
+from pagination import paginate_sql
+from records import record_class
+from statements import prepared
+
+class Column:
+    """Columna del SELECT. Con public=False se lee pero no va en la respuesta (p. ej. llaves para buscar en caché)"""
+    __slots__ = ("expr", "name", "public")
+
+    def __init__(self, expr, name, public=True):
+        self.expr = expr
+        self.name = name
+        self.public = public
+
+class Ref:
+    """Campo `field` de la tabla de referencia `table`, buscado por el valor de la columna `via`"""
+    __slots__ = ("table", "via", "field", "name")
+
+    def __init__(self, table, via, field, name):
+        self.table = table
+        self.via = via
+        self.field = field
+        self.name = name
+
+class Query:
+    """Consulta de un recurso: SQL y mapeador compilados una vez"""
+
+    def __init__(self, name, source, fields, id_column):
+        self.name = name
+        self.fields = tuple(fields)
+        self.columns = [f for f in self.fields if isinstance(f, Column)]
+        self.id_column = id_column
+        self.sql = "SELECT " + ", ".join(c.expr for c in self.columns) + " FROM " + source
+        self.by_id = prepared(name, self.sql + f" WHERE {id_column} = %s")
+        # Posición de la llave en la fila (para split_page)
+        self.key = itemgetter([c.expr for c in self.columns].index(id_column))
+        # Tablas de referencia que usa el mapeador
+        self.tables = tuple(dict.fromkeys(f.table for f in self.fields if isinstance(f, Ref)))
+        names = [f.name for f in self.fields if isinstance(f, Ref) or f.public]
+        self.record = record_class(name.title().replace("_", "") + "Record", names)
+        self.map_row, self.map_record = self._compile(names)
+
+    def _compile(self, names):
+        """Genera map_row(row, dims) (dict literal) y map_record(row, dims) (Record) en el orden de `fields`"""
+        index = {c.name: i for i, c in enumerate(self.columns)}
+        lookups = {}
+        prelude = []
+        values = []
+        for f in self.fields:
+            if isinstance(f, Column):
+                if f.public:
+                    values.append(f"row[{index[f.name]}]")
+                continue
+            # Una sola búsqueda por tabla y columna aunque se usen varios campos
+            var = lookups.get((f.table, f.via))
+            if var is None:
+                var = lookups[(f.table, f.via)] = f"ref{len(lookups)}"
+                prelude.append(f"    {var} = dims[{f.table!r}].get(row[{index[f.via]}]) or _EMPTY")
+            values.append(f"{var}.get({f.field!r})")
+        source = "\n".join(
+            ["def map_row(row, dims):"] + prelude
+            + ["    return {" + ", ".join(f"{n!r}: {v}" for n, v in zip(names, values)) + "}"]
+            + ["def map_record(row, dims):"] + prelude
+            + ["    return _Record(" + ", ".join(values) + ")"]
+        )
+        namespace = {"_EMPTY": {}, "_Record": self.record}
+        exec(compile(source, f"<query {self.name}>", "exec"), namespace)
+        return namespace["map_row"], namespace["map_record"]
+
+    def where(self, *conditions):
+        """SELECT con las condiciones (ya parametrizadas) unidas con AND"""
+        return self.sql + " WHERE " + " AND ".join(conditions)
+
+    def page(self, params, conditions, skip, limit, cursor):
+        """SELECT paginado (ver pagination.paginate_sql)"""
+        return paginate_sql(self.sql, params, conditions, self.id_column, skip, limit, cursor)
+
+    async def dimensions(self):
+        """Tablas de referencia en caché que necesita map_row"""
+        return {name: await reference_cache.table(name) for name in self.tables}
+
+    async def map_rows(self, rows):
+        """Filas de la base de datos convertidas a dicts de respuesta"""
+        dims = await self.dimensions()
+        map_row = self.map_row
+        return [map_row(row, dims) for row in rows]
+
+    async def map_one(self, row):
+        return (await self.map_rows([row]))[0] if row else None
+
+# ============ RECURSOS ============
+
+PRODUCTO = Query("producto", "producto p", [
+    Column("p.id", "id"), Column("p.nombre", "nombre"), Column("p.cantidad", "cantidad"),
+    Column("p.precio_base", "precio_base"), Column("p.id_tipo_producto", "id_tipo_producto"),
+    Column("p.id_conjunto", "id_conjunto"),
+    Ref("tipo_producto", "id_tipo_producto", "nombre", "tipo_producto_nombre"),
+    Ref("tipo_producto", "id_tipo_producto", "unidad_base", "tipo_producto_unidad_base"),
+    Ref("conjunto", "id_conjunto", "nombre", "conjunto_nombre"),
+], "p.id")
+
+PERTENENCIA = Query("pertenencia", "pertenencia pe LEFT JOIN producto p ON pe.id_producto = p.id", [
+    Column("pe.id", "id"), Column("pe.id_conjunto", "id_conjunto"), Column("pe.id_producto", "id_producto"),
+    Ref("conjunto", "id_conjunto", "nombre", "conjunto_nombre"),
+    Ref("conjunto", "id_conjunto", "sitio", "conjunto_sitio"),
+    Column("p.nombre", "producto_nombre"), Column("p.cantidad", "producto_cantidad"),
+    Column("p.id_tipo_producto", "producto_id_tipo_producto", public=False),
+    Ref("tipo_producto", "producto_id_tipo_producto", "nombre", "tipo_producto_nombre"),
+], "pe.id")
+
+TEXTOS = Query("texto", "textos t", [
+    Column("t.id", "id"), Column("t.id_tipo_producto", "id_tipo_producto"), Column("t.id_pais", "id_pais"),
+    Column("t.unidad", "unidad"), Column("t.unidades", "unidades"),
+    Ref("tipo_producto", "id_tipo_producto", "nombre", "tipo_producto_nombre"),
+    Ref("pais", "id_pais", "nombre", "pais_nombre"),
+], "t.id")
+
+PRECIO = Query("precio", """precio pr
+    LEFT JOIN pertenencia pe ON pr.id_pertenencia = pe.id
+    LEFT JOIN producto p ON pe.id_producto = p.id""", [
+    Column("pr.id", "id"), Column("pr.nombre", "nombre"), Column("pr.id_pertenencia", "id_pertenencia"),
+    Column("pr.id_pais", "id_pais"), Column("pr.price_id", "price_id"), Column("pr.cantidad_precio", "cantidad_precio"),
+    Column("pr.ratio_imagen", "ratio_imagen"), Column("pr.status", "status"), Column("pr.ambiente", "ambiente"),
+    Column("pe.id", "pertenencia_id"), Column("p.nombre", "producto_nombre"), Column("p.cantidad", "producto_cantidad"),
+    Column("p.id_tipo_producto", "producto_id_tipo_producto", public=False),
+    Column("pe.id_conjunto", "pertenencia_id_conjunto", public=False),
+    Ref("tipo_producto", "producto_id_tipo_producto", "nombre", "tipo_producto_nombre"),
+    Ref("conjunto", "pertenencia_id_conjunto", "nombre", "conjunto_nombre"),
+    Ref("pais", "id_pais", "nombre", "pais_nombre"),
+    Ref("pais", "id_pais", "moneda", "pais_moneda"),
+    Ref("pais", "id_pais", "simbolo", "pais_simbolo"),
+    Ref("pais", "id_pais", "side", "pais_side"),
+    Ref("pais", "id_pais", "decs", "pais_decs"),
+], "pr.id")
@@ -0,0 +1,49 @@
+"""
+Registros compactos para conjuntos grandes de filas.
+
+Un dict por fila guarda su propia tabla hash con todas las llaves; con miles
+de precios en la foto del catálogo eso es la mayor parte de la memoria. Un
+Record es una clase con __slots__ generada una vez por esquema: cada fila solo
+guarda sus valores y las llaves viven en la clase.
+
+Los Record se leen como dicts (registro["id"], registro.get("id")) y se
+convierten a dict con as_dict() solo al serializar la respuesta.
+"""
+
+class Record:
+    """Base de los registros generados con record_class()"""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+def record_class(name, fields):
+    """Clase Record con un slot por campo, en ese orden, un __init__ posicional y un as_dict con el dict literal"""
+    fields = tuple(fields)
+    args = ", ".join(fields)
+    body = "\n".join(f"    self.{f} = {f}" for f in fields) or "    pass"
+    items = ", ".join(f"{f!r}: self.{f}" for f in fields)
+    source = f"def __init__(self, {args}):\n{body}\ndef as_dict(self):\n    return {{{items}}}"
+    namespace = {}
+    exec(compile(source, f"<record {name}>", "exec"), namespace)
+    return type(name, (Record,), {"__slots__": fields, "__init__": namespace["__init__"], "as_dict": namespace["as_dict"]})
+
+def as_dict(item):
+    """dict de un Record (los dicts se devuelven tal cual)"""
+    return item.as_dict() if isinstance(item, Record) else item
@@ -0,0 +1,153 @@
+"""
+Seed orchestrator: runs every populate_* script in foreign-key order.
+
+The dependency graph is read from the FOREIGN KEY clauses of Splashmix.sql.
+A table starts as soon as all the tables it references are loaded, so
+independent tables (conjunto, tipo_producto, pais) load concurrently, each
+over its own connection. Every populate_* entry point returns True on success;
+a stage that returns False (or raises) fails and the tables that depend on it
+are skipped. At the end it prints the timing of every stage.
+
+Usage:
+    python seed.py                  # all tables, dev price list
+    python seed.py --precios prod   # production price list
+    python seed.py --init-db        # run init_db.create_tables() first
+    python seed.py --workers 1      # sequential
+"""
+
+import argparse
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import populate_conjunto
+import populate_tipo_producto
+import populate_paises
+import populate_productos
+import populate_pertenencia
+import populate_textos
+import populate_precios
+import populate_precios_prod
+
+SCHEMA_FILE = "Splashmix.sql"
+
+# Script that loads each table
+STAGES = {
+    "conjunto": populate_conjunto.populate_conjunto,
+    "tipo_producto": populate_tipo_producto.populate_tipo_producto,
+    "pais": populate_paises.populate_paises,
+    "producto": populate_productos.populate_productos,
+    "pertenencia": populate_pertenencia.populate_pertenencia,
+    "textos": populate_textos.populate_textos,
+    "precio": populate_precios.populate_precios,
+}
+
+# producto.id_conjunto has no FOREIGN KEY in Splashmix.sql but populate_productos fills it
+EXTRA_DEPENDENCIES = {"producto": {"conjunto"}}
+
+FOREIGN_KEY = re.compile(
+    r"ALTER TABLE `?(\w+)`? ADD FOREIGN KEY \(`?\w+`?\) REFERENCES `?(\w+)`?",
+    re.IGNORECASE,
+)
+
+def dependency_graph(schema_file=SCHEMA_FILE):
+    """{table: set of tables it references} from the FOREIGN KEY clauses of the schema"""
+    with open(schema_file, encoding="utf-8") as f:
+        schema = f.read()
+    graph = {table: set() for table in STAGES}
+    for table, referenced in FOREIGN_KEY.findall(schema):
+        if table != referenced:
+            graph.setdefault(table, set()).add(referenced)
+    for table, referenced in EXTRA_DEPENDENCIES.items():
+        graph.setdefault(table, set()).update(referenced)
+    return graph
+
+def check_acyclic(graph):
+    """Raise ValueError if the dependency graph has a cycle"""
+    pending = {table: set(deps) for table, deps in graph.items()}
+    while pending:
+        ready = [table for table, deps in pending.items() if not deps & pending.keys()]
+        if not ready:
+            raise ValueError(f"Foreign-key cycle between: {', '.join(sorted(pending))}")
+        for table in ready:
+            del pending[table]
+
+def _run_stage(table, fn, started):
+    start = time.perf_counter()
+    # The populate_* scripts print their own errors and return False
+    if not fn():
+        raise RuntimeError(f"populate script for {table} reported a failure")
+    return table, start - started, time.perf_counter() - start
+
+def seed(stages=STAGES, graph=None, workers=3):
+    """
+    Run every stage once its dependencies are done. Returns {table: (start_s, duration_s, status)}.
+    A failed stage skips everything that depends on it.
+    """
+    graph = graph or dependency_graph()
+    check_acyclic(graph)
+
+    started = time.perf_counter()
+    timings = {}
+    done, failed = set(), set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="seed") as executor:
+        while len(done) + len(failed) < len(stages):
+            for table in stages:
+                if table in done or table in failed or table in running.values():
+                    continue
+                deps = graph.get(table, set()) & stages.keys()
+                if deps & failed:
+                    print(f"Skipping {table}: depends on {', '.join(sorted(deps & failed))}")
+                    failed.add(table)
+                    timings[table] = (None, None, "skipped")
+                elif deps <= done:
+                    print(f"Starting {table}")
+                    running[executor.submit(_run_stage, table, stages[table], started)] = table
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                table = running.pop(future)
+                try:
+                    _, offset, duration = future.result()
+                    timings[table] = (offset, duration, "ok")
+                    done.add(table)
+                except Exception as e:
+                    print(f"Error in {table}: {e}")
+                    timings[table] = (None, None, "failed")
+                    failed.add(table)
+
+    wall = time.perf_counter() - started
+    report(timings, wall)
+    return timings
+
+def report(timings, wall):
+    """Print per-stage timing sorted by start time"""
+    print()
+    print(f"{'table':<15} {'start':>8} {'duration':>9}  status")
+    ordered = sorted(timings.items(), key=lambda item: (item[1][0] is None, item[1][0] or 0))
+    for table, (offset, duration, status) in ordered:
+        start = f"{offset:.3f}s" if offset is not None else "-"
+        took = f"{duration:.3f}s" if duration is not None else "-"
+        print(f"{table:<15} {start:>8} {took:>9}  {status}")
+    total = sum(duration for _, duration, _ in timings.values() if duration is not None)
+    print(f"Wall time: {wall:.3f}s (sum of stages {total:.3f}s)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed every table in foreign-key order")
+    parser.add_argument("--precios", choices=["dev", "prod"], default="dev", help="price list to load")
+    parser.add_argument("--init-db", action="store_true", help="run init_db.create_tables() before loading")
+    parser.add_argument("--workers", type=int, default=3, help="tables loaded at the same time")
+    args = parser.parse_args()
+
+    if args.init_db:
+        import init_db
+        if not init_db.create_tables():
+            raise SystemExit("init_db failed")
+
+    stages = dict(STAGES)
+    if args.precios == "prod":
+        stages["precio"] = populate_precios_prod.populate_precios_prod
+    seed(stages, workers=args.workers)
@@ -0,0 +1,226 @@
+"""
+Registro de consultas lentas de la capa de datos.
+
+Cada sentencia que tarda más de DB_SLOW_QUERY_MS (ejecución y lectura de
+filas) se agrupa por su huella: el SQL normalizado, sin literales ni
+parámetros y con los IN (...) colapsados, así que todas las combinaciones
+de filtros de /precios con la misma forma caen en el mismo grupo. Por huella
+se guardan ejecuciones lentas, tiempo total y máximo, la última muestra con
+sus parámetros y el último EXPLAIN.
+
+- El EXPLAIN se ejecuta en la misma conexión, como mucho una vez por huella
+  cada DB_SLOW_QUERY_EXPLAIN_INTERVAL segundos, para no cargar más la base
+  de datos justo cuando va lenta. Si el plan (tabla, tipo de acceso, índice)
+  cambia respecto del anterior se cuenta en plan_changes y se avisa en el log.
+- Cada consulta lenta se escribe en el log (WARNING, logger "db.slow") con sus
+  parámetros y, si se acaba de tomar, el EXPLAIN.
+- Se guardan como mucho DB_SLOW_QUERY_MAX_FINGERPRINTS huellas; las nuevas
+  se descartan (y se cuentan) al llegar al límite.
+- DB_SLOW_QUERY_MS=0 desactiva el registro.
+
+report() es lo que expone GET /debug/consultas-lentas.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", 500))
+DB_SLOW_QUERY_EXPLAIN = os.getenv("DB_SLOW_QUERY_EXPLAIN", "1") != "0"
+DB_SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("DB_SLOW_QUERY_EXPLAIN_INTERVAL", 60))
+DB_SLOW_QUERY_MAX_FINGERPRINTS = int(os.getenv("DB_SLOW_QUERY_MAX_FINGERPRINTS", 200))
+
+# Parámetros que se guardan por muestra (un IN puede traer cientos)
+PARAMS_MAX = 20
+
+logger = logging.getLogger("db.slow")
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+def normalize(sql):
+    """SQL sin literales ni parámetros (?), con IN (...) colapsados y espacios simples"""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+def _plan_signature(explain):
+    """Lo que define el plan: por tabla, el tipo de acceso y el índice elegido"""
+    return tuple((row.get("table"), row.get("type"), row.get("key")) for row in explain)
+
+class SlowQuery:
+    """Acumulados de una huella"""
+    __slots__ = ("fingerprint", "sql", "statement", "count", "time_total_ms", "time_max_ms",
+                 "rows_max", "last_ms", "last_params", "last_at", "explain", "explained_at",
+                 "explain_error", "plan_changes", "_next_explain")
+
+    def __init__(self, fp, sql, statement):
+        self.fingerprint = fp
+        self.sql = sql
+        self.statement = statement
+        self.count = 0
+        self.time_total_ms = 0.0
+        self.time_max_ms = 0.0
+        self.rows_max = 0
+        self.last_ms = None
+        self.last_params = None
+        self.last_at = None
+        self.explain = None
+        self.explained_at = None
+        self.explain_error = None
+        self.plan_changes = 0
+        self._next_explain = 0.0
+
+    def as_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "sql": self.sql,
+            "statement": self.statement,
+            "count": self.count,
+            "time_total_ms": round(self.time_total_ms, 3),
+            "time_avg_ms": round(self.time_total_ms / self.count, 3) if self.count else 0.0,
+            "time_max_ms": round(self.time_max_ms, 3),
+            "rows_max": self.rows_max,
+            "last_ms": round(self.last_ms, 3) if self.last_ms is not None else None,
+            "last_params": self.last_params,
+            "last_at": self.last_at,
+            "explain": self.explain,
+            "explained_at": self.explained_at,
+            "explain_error": self.explain_error,
+            "plan_changes": self.plan_changes,
+        }
+
+class SlowQueryLog:
+    """Consultas lentas agrupadas por huella"""
+
+    def __init__(self, threshold_ms=DB_SLOW_QUERY_MS, explain=DB_SLOW_QUERY_EXPLAIN,
+                 explain_interval=DB_SLOW_QUERY_EXPLAIN_INTERVAL, max_fingerprints=DB_SLOW_QUERY_MAX_FINGERPRINTS):
+        self.enabled = threshold_ms > 0
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.max_fingerprints = max_fingerprints
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._queries = {}
+        # Huella por texto de la consulta (las consultas se repiten, normalizar cuesta)
+        self._fingerprints = {}
+
+    def _fingerprint(self, sql):
+        cached = self._fingerprints.get(sql)
+        if cached is None:
+            normalized = normalize(sql)
+            cached = (fingerprint(normalized), normalized)
+            if len(self._fingerprints) < self.max_fingerprints * 10:
+                self._fingerprints[sql] = cached
+        return cached
+
+    def observe(self, conn, sql, params, seconds, rows):
+        """
+        Registra una consulta que superó el umbral (la capa de datos compara
+        `seconds` con `threshold` antes de llamar). Con `conn` se toma el
+        EXPLAIN si corresponde; nunca lanza excepciones.
+        """
+        try:
+            self._observe(conn, sql, params, seconds, rows)
+        except Exception:
+            logger.exception("No se pudo registrar la consulta lenta")
+
+    def _observe(self, conn, sql, params, seconds, rows):
+        fp, normalized = self._fingerprint(str(sql))
+        elapsed_ms = seconds * 1000
+        sample_params = list(params)[:PARAMS_MAX] if params else []
+        now = time.monotonic()
+        with self._lock:
+            entry = self._queries.get(fp)
+            if entry is None:
+                if len(self._queries) >= self.max_fingerprints:
+                    self.dropped += 1
+                else:
+                    entry = self._queries[fp] = SlowQuery(fp, normalized, getattr(sql, "name", None))
+            if entry is not None:
+                entry.count += 1
+                entry.time_total_ms += elapsed_ms
+                entry.time_max_ms = max(entry.time_max_ms, elapsed_ms)
+                entry.rows_max = max(entry.rows_max, rows)
+                entry.last_ms = elapsed_ms
+                entry.last_params = sample_params
+                entry.last_at = datetime.now().isoformat(timespec="seconds")
+                take_explain = (self.explain and conn is not None and now >= entry._next_explain
+                                and _EXPLAINABLE.match(sql) is not None)
+                if take_explain:
+                    # Se reserva antes de soltar el lock: un solo hilo toma el EXPLAIN
+                    entry._next_explain = now + self.explain_interval
+            else:
+                take_explain = False
+
+        explain = None
+        if take_explain:
+            explain, error = _run_explain(conn, sql, params)
+            previous = None
+            with self._lock:
+                entry.explain_error = error
+                if explain is not None:
+                    if entry.explain is not None and _plan_signature(entry.explain) != _plan_signature(explain):
+                        entry.plan_changes += 1
+                        previous = entry.explain
+                    entry.explain = explain
+                    entry.explained_at = entry.last_at
+            if previous is not None:
+                logger.warning("Cambió el plan de la consulta %s", fp,
+                               extra={"fingerprint": fp, "plan_before": previous, "plan_after": explain})
+
+        if logger.isEnabledFor(logging.WARNING):
+            extra = {"fingerprint": fp, "elapsed_ms": round(elapsed_ms, 1), "rows": rows, "params": sample_params}
+            if explain is not None:
+                extra["explain"] = explain
+            logger.warning("Consulta lenta: %s", normalized, extra=extra)
+
+    def report(self):
+        """Huellas ordenadas por tiempo total, con el umbral y las descartadas"""
+        with self._lock:
+            queries = [q.as_dict() for q in self._queries.values()]
+            dropped = self.dropped
+        queries.sort(key=lambda q: q["time_total_ms"], reverse=True)
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "enabled": self.enabled,
+            "fingerprints": len(queries),
+            "dropped": dropped,
+            "queries": queries,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._queries.clear()
+            self.dropped = 0
+
+def _run_explain(conn, sql, params):
+    """(filas del EXPLAIN como dicts, None) o (None, error)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN " + str(sql), tuple(params) if params else ())
+        columns = cursor.column_names
+        return [dict(zip(columns, row)) for row in cursor.fetchall()], None
+    except Exception as e:
+        return None, str(e)
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+slow_queries = SlowQueryLog()
@@ -0,0 +1,141 @@
+"""
+Sentencias preparadas para las consultas frecuentes de la API.
+
+Las consultas calientes (el JOIN de precios, el detalle de producto, los
+textos, las páginas de las listas) se registran como `Statement`. Cuando la
+capa de datos ejecuta un Statement con una conexión del pool, lo prepara una
+sola vez en esa conexión (COM_STMT_PREPARE) y las siguientes ejecuciones
+reutilizan el handle; el servidor ya no vuelve a parsear la consulta.
+
+- Cada conexión del pool guarda hasta DB_PREPARED_MAX_PER_CONNECTION
+  sentencias (LRU); al descartar la conexión se liberan con ella.
+- Con conexiones sueltas (sin pool) el Statement se ejecuta como consulta normal.
+- DB_PREPARED_STATEMENTS=0 desactiva las sentencias preparadas.
+- stats() reporta ejecuciones, preparaciones, errores y latencias por sentencia.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DB_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1") != "0"
+DB_PREPARED_MAX_PER_CONNECTION = int(os.getenv("DB_PREPARED_MAX_PER_CONNECTION", 32))
+
+class Statement(str):
+    """Consulta SQL registrada con un nombre para preparar y medir"""
+
+    def __new__(cls, name, sql):
+        statement = super().__new__(cls, sql)
+        statement.name = name
+        return statement
+
+def prepared(name, sql):
+    """Marca `sql` como sentencia preparada `name` (puede haber varias variantes del mismo nombre)"""
+    return Statement(name, sql)
+
+class StatementCache:
+    """Cursores preparados de una conexión física, por texto de la consulta (LRU)"""
+
+    def __init__(self, max_size=DB_PREPARED_MAX_PER_CONNECTION):
+        self.max_size = max_size
+        self._cursors = OrderedDict()
+
+    def get(self, sql):
+        entry = self._cursors.get(sql)
+        if entry is not None:
+            self._cursors.move_to_end(sql)
+        return entry
+
+    def put(self, sql, cursor):
+        if len(self._cursors) >= self.max_size:
+            _, (old_cursor, _) = self._cursors.popitem(last=False)
+            _close(old_cursor)
+        # mysql-connector solo reutiliza el handle si recibe el mismo objeto str
+        # (compara con `is`), así que se guarda el texto con el que se preparó
+        entry = (cursor, str(sql))
+        self._cursors[sql] = entry
+        return entry
+
+    def discard(self, sql):
+        entry = self._cursors.pop(sql, None)
+        if entry is not None:
+            _close(entry[0])
+
+    def __len__(self):
+        return len(self._cursors)
+
+def _close(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+class StatementRegistry:
+    """Ejecuta los Statement con su handle preparado y lleva estadísticas por nombre"""
+
+    def __init__(self, enabled=DB_PREPARED_STATEMENTS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _record(self, name, elapsed_ms=None, prepared_now=False, error=False):
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                "executions": 0, "prepares": 0, "errors": 0,
+                "time_total_ms": 0.0, "time_max_ms": 0.0,
+            })
+            if prepared_now:
+                stats["prepares"] += 1
+            if error:
+                stats["errors"] += 1
+                return
+            stats["executions"] += 1
+            stats["time_total_ms"] += elapsed_ms
+            stats["time_max_ms"] = max(stats["time_max_ms"], elapsed_ms)
+
+    def run(self, conn, cursor, statement, params, fetch):
+        """
+        Ejecuta `statement` y retorna fetch(cursor_con_resultados).
+
+        Usa el cursor preparado de la conexión si es del pool; si no (o si las
+        sentencias preparadas están desactivadas) usa `cursor` normal.
+        """
+        cache = getattr(conn, "statement_cache", None) if self.enabled else None
+        start = time.perf_counter()
+        prepared_now = False
+        try:
+            if cache is None:
+                cursor.execute(statement, params)
+                result = fetch(cursor)
+            else:
+                entry = cache.get(statement)
+                if entry is None:
+                    entry = cache.put(statement, conn.cursor(prepared=True))
+                    prepared_now = True
+                prepared_cursor, sql = entry
+                try:
+                    prepared_cursor.execute(sql, tuple(params))
+                    result = fetch(prepared_cursor)
+                except Exception:
+                    # El handle pudo quedar inválido; se vuelve a preparar la próxima vez
+                    cache.discard(statement)
+                    raise
+        except Exception:
+            self._record(statement.name, prepared_now=prepared_now, error=True)
+            raise
+        self._record(statement.name, (time.perf_counter() - start) * 1000, prepared_now)
+        return result
+
+    def stats(self):
+        """Ejecuciones, preparaciones, errores y latencias (ms) por sentencia"""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        for values in stats.values():
+            executions = values["executions"]
+            values["time_avg_ms"] = round(values["time_total_ms"] / executions, 3) if executions else 0.0
+            values["time_total_ms"] = round(values["time_total_ms"], 3)
+            values["time_max_ms"] = round(values["time_max_ms"], 3)
+        return stats
+
+statements = StatementRegistry()
@@ -1,53 +1,114 @@
+import argparse
 from connection import get_connection
 
-def update_precio_nombres():
+# New name: pais-sitio-cantidad-tipo_producto-ambiente (e.g. mxn-splashmix-1-imagen-sandbox)
+NOMBRE_SQL = "CONCAT(LOWER(pr.id_pais), '-', c.sitio, '-', p.cantidad, '-', tp.nombre, '-', pr.ambiente)"
+
+JOINS = """
+    JOIN pertenencia pe ON pr.id_pertenencia = pe.id
+    JOIN conjunto c ON pe.id_conjunto = c.id
+    JOIN producto p ON pe.id_producto = p.id
+    JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
+"""
+
+# Only rows whose name actually changes (BINARY: the collation ignores case).
+# Rows without ambiente produce a NULL name and are left alone.
+CAMBIA = f"{NOMBRE_SQL} IS NOT NULL AND (pr.nombre IS NULL OR BINARY pr.nombre <> BINARY {NOMBRE_SQL})"
+
+def dry_run(cursor):
+    """Print the names that would change without writing anything"""
+    cursor.execute(f"SELECT pr.id, pr.nombre, {NOMBRE_SQL} FROM precio pr {JOINS} WHERE {CAMBIA} ORDER BY pr.id")
+    rows = cursor.fetchall()
+    for price_id, old_name, new_name in rows:
+        print(f"ID {price_id}: {old_name} -> {new_name}")
+    print(f"Dry run. {len(rows)} rows would change.")
+
+def update_set_based(cursor, conn, chunk_size=None):
+    """
+    Recompute the names with UPDATE ... JOIN, touching only rows that change.
+
+    Without chunk_size it is a single statement; with chunk_size the table is
+    walked in id ranges of that size, committing each range so locks are short.
+    """
+    update_sql = f"UPDATE precio pr {JOINS} SET pr.nombre = {NOMBRE_SQL} WHERE {CAMBIA}"
+
+    if not chunk_size:
+        cursor.execute(update_sql)
+        conn.commit()
+        print(f"Finished. Updated {cursor.rowcount} rows.")
+        return
+
+    cursor.execute("SELECT MIN(id), MAX(id) FROM precio")
+    min_id, max_id = cursor.fetchone()
+    if min_id is None:
+        print("Finished. Updated 0 rows.")
+        return
+
+    updated_count = 0
+    start = min_id - 1
+    while start < max_id:
+        end = start + chunk_size
+        cursor.execute(update_sql + " AND pr.id > %s AND pr.id <= %s", (start, end))
+        conn.commit()
+        updated_count += cursor.rowcount
+        print(f"Updated ids ({start}, {end}]: {cursor.rowcount} rows")
+        start = end
+    print(f"Finished. Updated {updated_count} rows.")
+
+def update_per_row(cursor, conn):
+    """Original mode: one UPDATE per precio"""
+    # Fetch necessary data to construct the name
+    query = f"""
+        SELECT
+            pr.id,
+            pr.id_pais,
+            c.sitio,
+            p.cantidad,
+            tp.nombre as tipo_producto_nombre,
+            pr.ambiente
+        FROM precio pr
+        {JOINS}
+    """
+
+    cursor.execute(query)
+    rows = cursor.fetchall()
+
+    updated_count = 0
+
+    for row in rows:
+        price_id = row[0]
+        pais_iso = row[1].lower() # mxn
+        sitio = row[2] # splashmix
+        cantidad = row[3] # 1, 10, etc
+        tipo_prod = row[4] # imagen
+        ambiente = row[5] # sandbox
+
+        # Construct new name: pais-sitio-cantidad-tipo_producto-ambiente
+        new_name = f"{pais_iso}-{sitio}-{cantidad}-{tipo_prod}-{ambiente}"
+
+        # Update
+        update_sql = "UPDATE precio SET nombre = %s WHERE id = %s"
+        cursor.execute(update_sql, (new_name, price_id))
+        updated_count += 1
+        print(f"Updated ID {price_id} to: {new_name}")
+
+    conn.commit()
+    print(f"Finished. Updated {updated_count} rows.")
+
+def update_precio_nombres(dry=False, chunk_size=None, per_row=False):
     conn = get_connection()
     if not conn:
         return
 
     cursor = conn.cursor()
-    
+
     try:
-        # Fetch necessary data to construct the name
-        query = """
-            SELECT 
-                pr.id,
-                pr.id_pais,
-                c.sitio,
-                p.cantidad,
-                tp.nombre as tipo_producto_nombre,
-                pr.ambiente
-            FROM precio pr
-            JOIN pertenencia pe ON pr.id_pertenencia = pe.id
-            JOIN conjunto c ON pe.id_conjunto = c.id
-            JOIN producto p ON pe.id_producto = p.id
-            JOIN tipo_producto tp ON p.id_tipo_producto = tp.id
-        """
-        
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        
-        updated_count = 0
-        
-        for row in rows:
-            price_id = row[0]
-            pais_iso = row[1].lower() # mxn
-            sitio = row[2] # splashmix
-            cantidad = row[3] # 1, 10, etc
-            tipo_prod = row[4] # imagen
-            ambiente = row[5] # sandbox
-            
-            # Construct new name: pais-sitio-cantidad-tipo_producto-ambiente
-            new_name = f"{pais_iso}-{sitio}-{cantidad}-{tipo_prod}-{ambiente}"
-            
-            # Update
-            update_sql = "UPDATE precio SET nombre = %s WHERE id = %s"
-            cursor.execute(update_sql, (new_name, price_id))
-            updated_count += 1
-            print(f"Updated ID {price_id} to: {new_name}")
-            
-        conn.commit()
-        print(f"Finished. Updated {updated_count} rows.")
+        if dry:
+            dry_run(cursor)
+        elif per_row:
+            update_per_row(cursor, conn)
+        else:
+            update_set_based(cursor, conn, chunk_size)
 
     except Exception as e:
         print(f"Error updating names: {e}")
@@ -56,5 +117,9 @@ def update_precio_nombres():
         conn.close()
 
 if __name__ == "__main__":
-    update_precio_nombres.py = update_precio_nombres
-    update_precio_nombres()
+    parser = argparse.ArgumentParser(description="Rebuild precio.nombre as pais-sitio-cantidad-tipo-ambiente")
+    parser.add_argument("--dry-run", action="store_true", help="only list the names that would change")
+    parser.add_argument("--chunk-size", type=int, help="update in id ranges of this size instead of one statement")
+    parser.add_argument("--per-row", action="store_true", help="original mode, one UPDATE per row")
+    args = parser.parse_args()
+    update_precio_nombres(dry=args.dry_run, chunk_size=args.chunk_size, per_row=args.per_row)